@@ -0,0 +1,156 @@
+import json
+import math
+import os
+
+
+class SpendingMonitor:
+    """Online per-category spending statistics used to flag unusual expenses.
+
+    Each category keeps a Welford running mean and variance and a median
+    estimate that moves toward every new amount by a step proportional to the
+    running standard deviation, so old behaviour decays away. All updates are
+    O(1); nothing is recomputed over the history. An amount is flagged when the
+    category has enough observations, it sits ``threshold`` standard deviations
+    above the mean, and it is at least ``ratio`` times the median.
+
+    The statistics cover the spending records stamped on or after ``since``
+    (the start of the year they were seeded from); older records are checked
+    but never folded in, so deleting one leaves the statistics alone.
+    """
+
+    def __init__(self, path="spending_stats.json", threshold=3.0, ratio=2.0, min_count=5, decay=0.05):
+        self.path = path
+        self.threshold = threshold
+        self.ratio = ratio
+        self.min_count = min_count
+        self.decay = decay
+        self.stats = {}  # category -> {'n', 'mean', 'm2', 'median'}
+        self.flagged = set()  # (timestamp, category, amount) of flagged records
+        self.since = None  # Timestamp from which records are folded into the statistics
+        self.dirty = False
+        self.loaded = self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not state.get('since'):
+            return False  # Written before records were tracked by date: seed again
+        self.since = state['since']
+        self.stats = state.get('stats', {})
+        self.flagged = {tuple(key) for key in state.get('flagged', [])}
+        return True
+
+    def save(self):
+        if not self.dirty:
+            return
+        with open(self.path, 'w') as f:
+            json.dump({'since': self.since, 'stats': self.stats, 'flagged': sorted(self.flagged)}, f)
+        self.dirty = False
+
+    @staticmethod
+    def key(record):
+        return (record['timestamp'], record['category'], record['amount'])
+
+    def covers(self, record):
+        """Whether record is (or would be) part of the statistics"""
+        return self.since is not None and str(record['timestamp']) >= self.since
+
+    def std(self, stats):
+        return math.sqrt(stats['m2'] / (stats['n'] - 1)) if stats['n'] > 1 else 0.0
+
+    def check(self, category, amount):
+        """Return a short reason if amount is unusual for category, else None"""
+        stats = self.stats.get(category)
+        if not stats or stats['n'] < self.min_count:
+            return None
+        std = self.std(stats)
+        if std == 0 or amount < stats['median'] * self.ratio:
+            return None
+        z = (amount - stats['mean']) / std
+        if z < self.threshold:
+            return None
+        return f"{z:.1f}σ above the usual {stats['median']:.2f} for {category}"
+
+    def update(self, category, amount):
+        stats = self.stats.setdefault(category, {'n': 0, 'mean': 0.0, 'm2': 0.0, 'median': amount})
+        stats['n'] += 1
+        delta = amount - stats['mean']
+        stats['mean'] += delta / stats['n']
+        stats['m2'] += delta * (amount - stats['mean'])
+        step = self.decay * (self.std(stats) or abs(delta))
+        if amount > stats['median']:
+            stats['median'] = min(amount, stats['median'] + step)
+        elif amount < stats['median']:
+            stats['median'] = max(amount, stats['median'] - step)
+        self.dirty = True
+
+    def observe(self, record, amount):
+        """Check a new record against its category, then fold it into the statistics"""
+        reason = self.check(record['category'], amount)
+        if reason:
+            self.flagged.add(self.key(record))
+        if self.covers(record):
+            self.update(record['category'], amount)
+        return reason
+
+    def forget(self, record, amount):
+        """Remove a deleted record from the running mean and variance"""
+        self.flagged.discard(self.key(record))
+        if not self.covers(record):
+            return
+        stats = self.stats.get(record['category'])
+        if not stats:
+            return
+        if stats['n'] <= 1:
+            del self.stats[record['category']]
+        else:
+            mean = (stats['n'] * stats['mean'] - amount) / (stats['n'] - 1)
+            stats['m2'] = max(0.0, stats['m2'] - (amount - mean) * (amount - stats['mean']))
+            stats['mean'] = mean
+            stats['n'] -= 1
+        self.dirty = True
+
+    def is_flagged(self, record):
+        return self.key(record) in self.flagged
+
+    def rename(self, old, new):
+        """Move (or merge, with Chan's parallel update) the statistics of a renamed category"""
+        source = self.stats.pop(old, None)
+        if source is not None:
+            target = self.stats.get(new)
+            if target is None:
+                self.stats[new] = source
+            else:
+                n = target['n'] + source['n']
+                delta = source['mean'] - target['mean']
+                target['m2'] += source['m2'] + delta * delta * target['n'] * source['n'] / n
+                target['mean'] += delta * source['n'] / n
+                target['median'] = (target['median'] * target['n'] + source['median'] * source['n']) / n
+                target['n'] = n
+        self.flagged = {(t, new if c == old else c, a) for t, c, a in self.flagged}
+        self.dirty = True
+
+    def rescale(self, factor):
+        """Express the statistics in another currency, factor being the exchange rate to it"""
+        for stats in self.stats.values():
+            stats['mean'] *= factor
+            stats['median'] *= factor
+            stats['m2'] *= factor * factor
+        self.dirty = True
+
+    def reset(self):
+        """Drop all statistics and flags so they can be seeded again"""
+        self.stats = {}
+        self.flagged = set()
+        self.since = None
+        self.loaded = False
+        self.dirty = True
+
+    def remove(self, category):
+        self.stats.pop(category, None)
+        self.dirty = True
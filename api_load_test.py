@@ -0,0 +1,90 @@
+"""Load test for the local ledger API.
+
+Start the tracker with ``python complete_one.py --api`` and then run, e.g.::
+
+    python api_load_test.py --requests 5000 --concurrency 100 --write-ratio 0.2
+
+Writes add ``LoadTest`` records to the live ledger, the yearly partitions
+under ``budget_data/`` in the tracker's working directory. Start the tracker
+from a scratch working directory (or one holding a copy of ``budget_data/``)
+if the data matters.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+async def request(reader, writer, host, method, path, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(args, counter, latencies, errors):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while counter[0] < args.requests:
+            counter[0] += 1
+            if random.random() < args.write_ratio:
+                method, path = "POST", "/transactions"
+                body = {
+                    'type': random.choice(['income', 'spending']),
+                    'category': "LoadTest",
+                    'amount': round(random.uniform(1, 100), 2),
+                    'comment': "api_load_test",
+                }
+            else:
+                method, path, body = "GET", random.choice(["/totals", "/transactions?type=income"]), None
+
+            started = time.perf_counter()
+            status = await request(reader, writer, f"{args.host}:{args.port}", method, path, body)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def main(args):
+    counter = [0]
+    latencies = []
+    errors = []
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(args, counter, latencies, errors) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"Requests:    {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"Concurrency: {args.concurrency}, write ratio {args.write_ratio:.0%}")
+    print(f"Latency ms:  p50 {percentile(0.5):.1f}  p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}")
+    print(f"Errors:      {len(errors)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Budget Tracker JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import numpy as np
+
+RECORD_TYPES = ('income', 'spending')
+# Escapes are skipped whole so an escaped backslash is never read as the start of a backreference
+REFERENCES = re.compile(r"\\[1-9]|\\.|\(\?P=|\(\?\(", re.DOTALL)
+
+
+def check_pattern(pattern):
+    """Raise re.error unless pattern still means the same once merged into the rules regex.
+
+    Each pattern becomes one named group of a bigger alternation, so inline global
+    flags, backreferences (group numbers shift) and named groups (names clash
+    between rules) are rejected.
+    """
+    if re.compile(pattern).groupindex:
+        raise re.error("named groups are not supported in rule patterns", pattern)
+    re.compile(f"(?P<a0>{pattern})")  # Inline global flags or a reference to the enclosing group fail here
+    if any(match.group()[0] == "(" or match.group()[1].isdigit() for match in REFERENCES.finditer(pattern)):
+        raise re.error("backreferences are not supported in rule patterns", pattern)
+
+
+class CategoryRules:
+    """Keyword, regex and amount-range rules that pick a category for a transaction.
+
+    Rules live in a JSON list, each entry shaped like::
+
+        {"type": "spending", "category": "Food", "keyword": "grocer",
+         "pattern": null, "min_amount": null, "max_amount": 200}
+
+    ``keyword`` matches a case-insensitive word prefix, ``pattern`` is a regular
+    expression, and a rule with neither matches on amount alone. Earlier rules
+    win. The distinct rule texts of each type are merged into one regex with a
+    named group each, so a whole batch of comments is scanned in a single pass
+    that also reports matches overlapping each other.
+    """
+
+    def __init__(self, path="category_rules.json"):
+        self.path = path
+        self.rules = []
+        self.matchers = {}
+        self.skipped = []  # Messages for rules (or a whole file) that could not be loaded
+        self.load()
+
+    def load(self):
+        """Read the rules file, skipping (and noting in self.skipped) any rule that cannot be used"""
+        self.rules = []
+        self.skipped = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    rules = json.load(f)
+                if not isinstance(rules, list):
+                    raise ValueError("expected a list of rules")
+            except (OSError, ValueError) as e:
+                self.skipped.append(f"{self.path}: {str(e)}")
+                rules = []
+            for number, rule in enumerate(rules, 1):
+                try:
+                    self.check_rule(rule)
+                except (KeyError, TypeError, ValueError, re.error) as e:
+                    self.skipped.append(f"Rule {number}: {str(e)}")
+                    continue
+                self.rules.append(rule)
+        self.compile()
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.rules, f, indent=2)
+
+    @staticmethod
+    def check_rule(rule):
+        if not isinstance(rule, dict) or not isinstance(rule['category'], str):
+            raise TypeError("a rule needs a category name")
+        if rule.get('type', RECORD_TYPES[0]) not in RECORD_TYPES:
+            raise ValueError(f"type must be one of {', '.join(RECORD_TYPES)}")
+        for bound in ('min_amount', 'max_amount'):
+            if rule.get(bound) is not None:
+                float(rule[bound])
+        if rule.get('keyword') and not isinstance(rule['keyword'], str):
+            raise TypeError("keyword must be a string")
+        if rule.get('pattern'):
+            check_pattern(rule['pattern'])
+
+    def add_rule(self, kind, category, keyword=None, pattern=None, min_amount=None, max_amount=None):
+        rule = {
+            'type': kind,
+            'category': category,
+            'keyword': keyword,
+            'pattern': pattern,
+            'min_amount': min_amount,
+            'max_amount': max_amount,
+        }
+        self.check_rule(rule)  # Fail before a rule that cannot be merged reaches self.rules
+        self.rules.append(rule)
+        self.compile()
+
+    def compile(self):
+        """Build, per type, one merged regex with a group per distinct rule text, plus the amount-only rules"""
+        self.matchers = {}
+        for kind in RECORD_TYPES:
+            texts = {}  # regex source -> indices of the rules using it, in rule order
+            amount_rules = []
+            for index, rule in enumerate(self.rules):
+                if rule.get('type', kind) != kind:
+                    continue
+                if rule.get('pattern'):
+                    source = rule['pattern']
+                elif rule.get('keyword'):
+                    source = f"\\b{re.escape(rule['keyword'])}"
+                else:
+                    amount_rules.append(index)
+                    continue
+                texts.setdefault(source, []).append(index)
+            # Rules sharing a text share one alternative, so their amount ranges are all tried on its matches
+            alternatives = [(re.compile(source, re.IGNORECASE), np.array(indices)) for source, indices in texts.items()]
+            regex = re.compile("|".join(f"(?P<a{n}>{source})" for n, source in enumerate(texts)), re.IGNORECASE) if texts else None
+            # lastindex names the outermost group that closed last, i.e. the alternative's own group,
+            # even when a user pattern has capturing groups of its own
+            groups = {regex.groupindex[f"a{n}"]: n for n in range(len(texts))} if regex else {}
+            self.matchers[kind] = (regex, groups, alternatives, amount_rules)
+
+    def ranges(self):
+        """Per-rule amount bounds as arrays, open ends as infinities"""
+        low = np.array([-np.inf if r.get('min_amount') is None else r['min_amount'] for r in self.rules], dtype=float)
+        high = np.array([np.inf if r.get('max_amount') is None else r['max_amount'] for r in self.rules], dtype=float)
+        return low, high
+
+    def categorize(self, kind, comments, amounts):
+        """Return the rule category for each (comment, amount) pair, or None where no rule applies"""
+        regex, groups, alternatives, amount_rules = self.matchers.get(kind, (None, {}, [], []))
+        amounts = np.asarray(amounts, dtype=float)
+        best = np.full(len(amounts), len(self.rules))
+        low, high = self.ranges()
+
+        def settle(rows, indices):
+            # Lower each row's best rule to the earliest of indices whose amount range fits it
+            for index in indices:
+                fits = rows[(amounts[rows] >= low[index]) & (amounts[rows] <= high[index])]
+                best[fits] = np.minimum(best[fits], index)
+
+        if regex is not None and len(amounts):
+            # Scan every comment in one pass over a newline-joined blob, then map
+            # match offsets back to their comment with one binary search.
+            texts = [c.replace("\n", " ") if isinstance(c, str) else "" for c in comments]
+            starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]])
+            blob = "\n".join(texts)
+            positions = []
+            found = []
+            # Resume one character after each match start rather than at its end (as finditer
+            # would), so a match never hides another rule's text overlapping it
+            match = regex.search(blob)
+            while match:
+                positions.append(match.start())
+                found.append(groups[match.lastindex])
+                match = regex.search(blob, match.start() + 1)
+            if found:
+                rows = np.searchsorted(starts, positions, side='right') - 1
+                found = np.array(found)
+                for n, (_, indices) in enumerate(alternatives):
+                    settle(rows[found == n], indices)
+                # Only the first alternative matching at a position is reported. Later ones there can
+                # still win where its first rule's amount range failed, so try those few directly.
+                first = np.array([indices[0] for _, indices in alternatives])
+                failed = (amounts[rows] < low[first[found]]) | (amounts[rows] > high[first[found]])
+                for row, n, position in zip(rows[failed], found[failed], np.asarray(positions)[failed]):
+                    for pattern, indices in alternatives[n + 1:]:
+                        if indices[0] >= best[row]:
+                            break
+                        if pattern.match(blob, position):
+                            settle(np.array([row]), indices)
+
+        if amount_rules:
+            for index in amount_rules:
+                mask = (best > index) & (amounts >= low[index]) & (amounts <= high[index])
+                best[mask] = index
+
+        categories = np.array([rule['category'] for rule in self.rules] + [None], dtype=object)
+        return categories[best].tolist()
+
+    def suggest(self, kind, comment, amount):
+        return self.categorize(kind, [comment], [amount])[0]
+
+    def rename_category(self, kind, old, new):
+        """Point rules at a renamed (or merged) category"""
+        for rule in self.rules:
+            if rule.get('type', kind) == kind and rule['category'] == old:
+                rule['category'] = new
+        self.compile()
+
+    def remove_category(self, kind, category):
+        self.rules = [rule for rule in self.rules if not (rule.get('type', kind) == kind and rule['category'] == category)]
+        self.compile()
@@ -1,23 +1,64 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import argparse
+import bisect
+import csv
 import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import io
+import json
+import math
+import multiprocessing
 import os
+import shutil
+import webbrowser
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from anomaly import SpendingMonitor
+from archive import export_archive, import_archive
+from categorizer import CategoryRules
+from currency import DEFAULT_CURRENCY, RateTable, format_amount, to_days
+from ledger_events import LedgerEvents
+from ledger_store import COLUMNS, LedgerStore, merge_summaries
+from pivot import MONTH_NAMES, MONTHS, PivotCache, build_grid
+from reconcile import load_statement, reconcile
+from report import assemble_report, render_month, slice_by_month, yearly_summary
 
 class BudgetTracker:
     def __init__(self, root):
         self.root = root
-        self.data_file = "budget_data.csv"
+        self.data_file = "budget_data.csv"  # Single-file ledger, migrated into yearly partitions
+        self.store = LedgerStore("budget_data")
+        self.partition_summaries = {}  # year -> summary header of that partition
+        self.loaded_years = set()
+        self.dirty_years = set()
+        self.checkpoint_partitions = {}  # year -> size, mtime and digest recorded in the checkpoint
+        self.settings_file = "budget_settings.json"
+        self.base_currency = DEFAULT_CURRENCY
+        self.rates = RateTable("exchange_rates.csv")
+        self.ledger_sums = {}  # (type, currency, day) -> native amount, converted in bulk
+        self.ledger_version = 0  # Bumped on changes that can touch every partition (renames, base currency, reloads)
+        self.partition_versions = {}  # (type, year) -> bumped on every change to that part of the ledger
+        self.pivot_cache = PivotCache()
+        self.events = LedgerEvents(root)  # Open views subscribe to added/deleted/category changes
+        self.category_rules = CategoryRules("category_rules.json")
+        if self.category_rules.skipped:
+            messagebox.showwarning("Category rules", "Some category rules were skipped:\n" + "\n".join(self.category_rules.skipped))
+        self.spending_monitor = SpendingMonitor("spending_stats.json")
         self.total_spending = 0.0
         self.total_income = 0.0
         self.spending_history = []
         self.income_history = []
         self.spending_categories = ["Food"]  # Default category
         self.income_categories = ["Salary"]  # Default category
+        self.load_settings()
         self.load_data()  # Load existing data
+        self.seed_spending_monitor()
         self.setup_ui()
+        self.events.subscribe(self.ledger_changed)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         self.root.title("Budget Tracker")
@@ -32,16 +73,22 @@ class BudgetTracker:
         top_frame.pack(fill=tk.X, pady=(0, 20))
 
         # Display labels
-        self.spending_label = tk.Label(top_frame, text=f"Total spending: ${self.total_spending:.2f}", font=("Arial", 12))
+        self.spending_label = tk.Label(top_frame, text=f"Total spending: {self.money(self.total_spending)}", font=("Arial", 12))
         self.spending_label.pack(side=tk.LEFT, padx=10)
         
-        self.income_label = tk.Label(top_frame, text=f"Total income: ${self.total_income:.2f}", font=("Arial", 12))
+        self.income_label = tk.Label(top_frame, text=f"Total income: {self.money(self.total_income)}", font=("Arial", 12))
         self.income_label.pack(side=tk.LEFT, padx=10)
         
         balance = self.total_income - self.total_spending
-        self.balance_label = tk.Label(top_frame, text=f"Current balance: ${balance:.2f}", font=("Arial", 12, 'bold'))
+        self.balance_label = tk.Label(top_frame, text=f"Current balance: {self.money(balance)}", font=("Arial", 12, 'bold'))
         self.balance_label.pack(side=tk.LEFT, padx=10)
 
+        self.base_currency_box = ttk.Combobox(top_frame, values=self.rates.currencies(), state='readonly', width=6)
+        self.base_currency_box.set(self.base_currency)
+        self.base_currency_box.bind("<<ComboboxSelected>>", lambda e: self.set_base_currency(self.base_currency_box.get()))
+        self.base_currency_box.pack(side=tk.RIGHT, padx=10)
+        tk.Label(top_frame, text="Base:", font=("Arial", 10)).pack(side=tk.RIGHT)
+
         # Main title
         tk.Label(main_frame, text="Budget Tracker", font=("Arial", 20)).pack(pady=(0, 20))
 
@@ -86,6 +133,16 @@ class BudgetTracker:
         )
         spending_btn.pack(side=tk.RIGHT, padx=20, expand=True)
 
+        # Tools row
+        tools_frame = tk.Frame(main_frame)
+        tools_frame.pack(fill=tk.X)
+        tk.Button(tools_frame, text="Batch Entry", command=self.open_batch_window).pack(side=tk.LEFT, padx=5)
+        tk.Button(tools_frame, text="Reconcile", command=self.open_reconcile_window).pack(side=tk.LEFT, padx=5)
+        tk.Button(tools_frame, text="Pivot", command=self.open_pivot_window).pack(side=tk.LEFT, padx=5)
+        tk.Button(tools_frame, text="Export Archive", command=self.export_ledger_archive).pack(side=tk.LEFT, padx=5)
+        tk.Button(tools_frame, text="Import Archive", command=self.import_ledger_archive).pack(side=tk.LEFT, padx=5)
+        tk.Button(tools_frame, text="Export Report", command=self.open_report_window).pack(side=tk.LEFT, padx=5)
+
         #tk.Button(button_frame, text="Income", command=self.open_income_window).pack(side=tk.LEFT, padx=20, expand=True)
         #tk.Button(button_frame, text="Spending", command=self.open_spending_window).pack(side=tk.RIGHT, padx=20, expand=True)
 
@@ -112,7 +169,7 @@ class BudgetTracker:
             values,
             labels=categories,
             colors=colors,
-            autopct=lambda p: f'${p * sum(values)/100:,.2f}',
+            autopct=lambda p: self.money(p * sum(values)/100, thousands=True),
             startangle=90,
             wedgeprops=dict(width=0.4, edgecolor='w'),
             pctdistance=0.85
@@ -127,84 +184,486 @@ class BudgetTracker:
         # Add savings info in center
         savings = self.total_income - self.total_spending
         savings_percent = (savings / self.total_income * 100) if self.total_income > 0 else 0
-        center_text = f"Savings: ${savings:,.2f}\n({savings_percent:.1f}%)"
+        center_text = f"Savings: {self.money(savings, thousands=True)}\n({savings_percent:.1f}%)"
         self.ax.text(0, 0, center_text, ha='center', va='center', fontsize=10, fontweight='bold')
         
         self.canvas.draw()
 
+    def year_frame(self, year):
+        """All in-memory records of one year as a partition DataFrame"""
+        prefix = str(year)
+        data = {column: [] for column in COLUMNS}
+        for kind, history in (('income', self.income_history), ('spending', self.spending_history)):
+            for record in history:
+                if record['timestamp'].startswith(prefix):
+                    data['type'].append(kind)
+                    data['category'].append(record['category'])
+                    data['amount'].append(record['amount'])
+                    data['timestamp'].append(record['timestamp'])
+                    data['comment'].append(record.get('comment', ''))
+                    data['currency'].append(record.get('currency', DEFAULT_CURRENCY))
+        return pd.DataFrame(data, columns=COLUMNS)
+
     def save_data(self):
-        """Save all data to CSV using pandas"""
-        data = {
-            'type': [],
-            'category': [],
-            'amount': [],
-            'timestamp': [],
-            'comment': []
-        }
+        """Rewrite the yearly partitions touched since the last save"""
+        # A partition can be dirty without being loaded when only its header is stale
+        self.load_partitions(self.dirty_years)
+        for year in sorted(self.dirty_years):
+            summary = self.store.write_partition(year, self.year_frame(year))
+            if summary is None:
+                self.partition_summaries.pop(year, None)
+            else:
+                self.partition_summaries[year] = summary
+        self.dirty_years.clear()
+        self.spending_monitor.save()
+
+    def seed_spending_monitor(self):
+        """First run only: build the spending statistics from the current year's records"""
+        if self.spending_monitor.loaded:
+            return
+        year = datetime.date.today().year
+        self.load_partitions([year])
+        self.spending_monitor.since = f"{year}-01-01"
+        # Older years may be loaded too (history views); the statistics start at since
+        records = [record for record in self.spending_history if self.spending_monitor.covers(record)]
+        for record, amount in zip(records, self.convert_records(records)):
+            self.spending_monitor.update(record['category'], float(amount))
+        self.spending_monitor.save()
+        self.spending_monitor.loaded = True
+
+    def load_data(self):
+        """Load totals from the checkpoint or the partition summaries, and rows of the current year only"""
+        try:
+            migrated = False
+            if os.path.exists(self.data_file) and not self.store.years():
+                self.store.migrate(self.data_file)
+                migrated = True
+            
+            if not migrated and self.load_checkpoint():
+                # Figures are on screen from the checkpoint; check it against the files once the UI is up
+                self.root.after(1, self.verify_checkpoint)
+                return
+            
+            self.apply_summaries({year: self.store.read_summary(year) for year in self.store.years()})
+            self.load_partitions([datetime.date.today().year])
+            if migrated:
+                self.write_checkpoint()
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load data: {str(e)}")
+
+    def apply_summaries(self, summaries, categories=None):
+        """Rebuild totals and category lists from partition summaries"""
+        self.partition_summaries = summaries
         
-        for record in self.income_history:
-            data['type'].append('income')
-            data['category'].append(record['category'])
-            data['amount'].append(record['amount'])
-            data['timestamp'].append(record['timestamp'])
-            data['comment'].append(record.get('comment', ''))
+        # All-time totals come from the per-day sums in each summary, no rows needed
+        self.ledger_sums = {}
+        income_cats = dict.fromkeys(categories['income']) if categories else {}
+        spending_cats = dict.fromkeys(categories['spending']) if categories else {}
+        for year in sorted(summaries):
+            summary = summaries[year]
+            for kind, currency, day, amount in summary['days']:
+                self.ledger_sums[(kind, currency, day)] = amount
+            income_cats.update(dict.fromkeys(summary['totals'].get('income', {})))
+            spending_cats.update(dict.fromkeys(summary['totals'].get('spending', {})))
+        self.check_base_currency()
+        self.recompute_totals()
         
-        for record in self.spending_history:
-            data['type'].append('spending')
-            data['category'].append(record['category'])
-            data['amount'].append(record['amount'])
-            data['timestamp'].append(record['timestamp'])
-            data['comment'].append(record.get('comment', ''))
+        self.income_categories = list(income_cats) if income_cats else ["Salary"]
+        self.spending_categories = list(spending_cats) if spending_cats else ["Food"]
+
+    def check_base_currency(self):
+        """Fall back to the default currency if the saved base cannot convert every ledger currency"""
+        if self.base_currency == DEFAULT_CURRENCY:
+            return
+        missing = sorted({currency for _, currency, _ in self.ledger_sums
+                          if currency != self.base_currency and self.rates.series(currency, self.base_currency) is None})
+        if missing:
+            messagebox.showwarning("Base currency", f"No exchange rate from {', '.join(missing)} to {self.base_currency}, "
+                                                    f"showing totals in {DEFAULT_CURRENCY}")
+            self.base_currency = DEFAULT_CURRENCY
+
+    def load_checkpoint(self):
+        """Restore totals, category lists and summaries from the checkpoint, if there is one"""
+        checkpoint = self.store.read_checkpoint()
+        if not checkpoint or checkpoint.get('version') != 1:
+            return False
+        self.checkpoint_partitions = {int(year): entry for year, entry in checkpoint['partitions'].items()}
+        self.apply_summaries(
+            {year: entry['summary'] for year, entry in self.checkpoint_partitions.items()},
+            {'income': checkpoint['income_categories'], 'spending': checkpoint['spending_categories']},
+        )
+        return True
+
+    def write_checkpoint(self):
+        """Record aggregates and partition fingerprints so the next start needs no row scan"""
+        partitions = {}
+        for year in self.store.years():
+            if year not in self.partition_summaries:
+                continue
+            size, mtime_ns = self.store.stat(year)
+            previous = self.checkpoint_partitions.get(year)
+            if previous and (previous['size'], previous['mtime_ns']) == (size, mtime_ns):
+                digest = previous['digest']
+            else:
+                digest = self.store.digest(year, size)
+            partitions[year] = {
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'digest': digest,
+                'summary': self.partition_summaries[year],
+            }
+        self.store.write_checkpoint({
+            'version': 1,
+            'base_currency': self.base_currency,
+            'total_income': self.total_income,
+            'total_spending': self.total_spending,
+            'row_count': sum(entry['summary']['rows'] for entry in partitions.values()),
+            'income_categories': self.income_categories,
+            'spending_categories': self.spending_categories,
+            'partitions': {str(year): entry for year, entry in partitions.items()},
+        })
+        self.checkpoint_partitions = partitions
+
+    def verify_checkpoint(self):
+        """Replay rows appended since the checkpoint, or rebuild in the background if it no longer matches"""
+        appended = []
+        years = self.store.years()
+        mismatch = set(self.checkpoint_partitions) != set(years)
+        for year in years:
+            entry = self.checkpoint_partitions.get(year)
+            if entry is None:
+                break
+            size, mtime_ns = self.store.stat(year)
+            if (size, mtime_ns) == (entry['size'], entry['mtime_ns']):
+                continue
+            if size > entry['size'] and self.store.digest(year, entry['size']) == entry['digest']:
+                appended.append((year, entry['size']))
+            else:
+                mismatch = True
+                break
         
-        df = pd.DataFrame(data)
-        df.to_csv(self.data_file, index=False)
+        if mismatch:
+            self.rebuild_in_background()
+            return
+        
+        for year, offset in appended:
+            tail = self.store.read_tail(year, offset)
+            self.partition_summaries[year] = merge_summaries(self.partition_summaries[year], self.store.summarize(tail))
+            self.dirty_years.add(year)  # Header no longer covers the appended rows; fixed on next save
+        if appended:
+            self.apply_summaries(self.partition_summaries,
+                                 {'income': self.income_categories, 'spending': self.spending_categories})
+            self.events.publish('reloaded')
+        self.load_partitions([datetime.date.today().year])
 
-    def load_data(self):
-        """Load data from CSV if it exists"""
-        if os.path.exists(self.data_file):
+    def rebuild_in_background(self):
+        """Recompute every partition summary from its rows on a worker thread"""
+        def scan(years):
+            rebuilt = {}
+            stale = set()
+            for year in years:
+                summary = self.store.summarize(self.store.read_partition(year))
+                rebuilt[year] = summary
+                if self.store.read_summary(year) != summary:
+                    stale.add(year)
+            return rebuilt, stale
+        
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(scan, self.store.years())
+        executor.shutdown(wait=False)
+        
+        def finish():
+            if not future.done():
+                self.root.after(100, finish)
+                return
             try:
-                df = pd.read_csv(self.data_file)
-                
-                for _, row in df.iterrows():
-                    record = {
-                        'category': row['category'],
-                        'amount': float(row['amount']),
-                        'timestamp': row['timestamp'],
-                        'comment': row.get('comment', '')
-                    }
-                    
-                    if row['type'] == 'income':
-                        self.income_history.append(record)
-                        self.total_income += record['amount']
-                    else:
-                        self.spending_history.append(record)
-                        self.total_spending += record['amount']
-                
-                # Update categories from loaded data
-                income_cats = df[df['type'] == 'income']['category'].unique()
-                spending_cats = df[df['type'] == 'spending']['category'].unique()
-                
-                self.income_categories = list(income_cats) if len(income_cats) > 0 else ["Salary"]
-                self.spending_categories = list(spending_cats) if len(spending_cats) > 0 else ["Food"]
-                
+                rebuilt, stale = future.result()
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load data: {str(e)}")
+                messagebox.showerror("Error", f"Failed to rebuild totals: {str(e)}")
+                return
+            # Years loaded meanwhile may hold unsaved edits, so their rows in memory win
+            for year in self.loaded_years:
+                rebuilt[year] = self.store.summarize(self.year_frame(year))
+            self.apply_summaries(rebuilt, {'income': self.income_categories, 'spending': self.spending_categories})
+            self.dirty_years.update(stale)
+            self.save_data()
+            self.write_checkpoint()
+            self.load_partitions([datetime.date.today().year])
+            self.events.publish('reloaded')
+        
+        self.root.after(100, finish)
+
+    def on_close(self):
+        try:
+            self.save_data()
+            self.write_checkpoint()
+        except Exception as e:
+            # Closing must always work; without a checkpoint the next start rebuilds in the background
+            messagebox.showerror("Error", f"Failed to save data: {str(e)}")
+        self.root.destroy()
+
+    def load_partitions(self, years):
+        """Read the rows of cold partitions into the in-memory history"""
+        years = [year for year in years if year not in self.loaded_years and os.path.exists(self.store.path(year))]
+        for year in years:
+            df = self.store.read_partition(year)
+            for kind, history in (('income', self.income_history), ('spending', self.spending_history)):
+                rows = df[df['type'] == kind]
+                history.extend(
+                    {'category': category, 'amount': amount, 'timestamp': timestamp, 'comment': comment, 'currency': currency}
+                    for category, amount, timestamp, comment, currency in zip(
+                        rows['category'].tolist(), rows['amount'].tolist(), rows['timestamp'].tolist(),
+                        rows['comment'].tolist(), rows['currency'].tolist())
+                )
+            self.loaded_years.add(year)
+            for kind in ('income', 'spending'):
+                self.bump_partition(kind, year)
+        if years:
+            # Older years load after newer ones, so keep each history in time order
+            self.income_history.sort(key=lambda r: r['timestamp'])
+            self.spending_history.sort(key=lambda r: r['timestamp'])
+
+    def ensure_loaded(self, start=None, end=None):
+        """Load every partition overlapping the optional date range (YYYY-MM-DD strings)"""
+        first = int(start[:4]) if start else None
+        last = int(end[:4]) if end else None
+        self.load_partitions([year for year in self.partition_summaries
+                              if (first is None or year >= first) and (last is None or year <= last)])
     
-    def update_income(self, amount):
-        self.total_income += float(amount)
-        self.income_label.config(text=f"Total income: ${self.total_income:.2f}")
+    def add_record(self, kind, category, amount, comment='', timestamp=None, currency=None):
+        """Insert a record into the in-memory ledger without touching the UI or disk"""
+        record = {
+            'category': category,
+            'amount': float(amount),
+            'timestamp': timestamp or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'comment': comment,
+            'currency': currency or self.base_currency
+        }
+        converted = self.to_base(record)  # Raises KeyError before anything changes if there is no rate
+        year = int(record['timestamp'][:4])
+        self.load_partitions([year])
+        self.loaded_years.add(year)
+        self.dirty_years.add(year)
+        key = (kind, record['currency'], record['timestamp'][:10])
+        self.ledger_sums[key] = self.ledger_sums.get(key, 0.0) + record['amount']
+        # Histories stay in time order, so a back-dated record (batch entry, API) goes in its place
+        if kind == 'income':
+            bisect.insort(self.income_history, record, key=lambda r: r['timestamp'])
+            self.total_income += converted
+        else:
+            self.spending_monitor.observe(record, converted)
+            bisect.insort(self.spending_history, record, key=lambda r: r['timestamp'])
+            self.total_spending += converted
+        self.add_category(kind, category)
+        self.record_changed('added', kind, record, converted)
+        return record
+
+    def preceding_records(self, kind, record):
+        """Yield the records before record in its time-ordered history, nearest first"""
+        history = self.income_history if kind == 'income' else self.spending_history
+        position = bisect.bisect_right(history, record['timestamp'], key=lambda r: r['timestamp']) - 1
+        while position >= 0 and history[position] is not record:
+            position -= 1
+        for position in range(position - 1, -1, -1):
+            yield history[position]
+
+    def delete_record(self, kind, index):
+        """Remove a record from the in-memory ledger without touching the UI or disk"""
+        if kind == 'income':
+            record = self.income_history.pop(index)
+            converted = self.to_base(record)
+            self.total_income -= converted
+        else:
+            record = self.spending_history.pop(index)
+            converted = self.to_base(record)
+            self.total_spending -= converted
+            self.spending_monitor.forget(record, converted)
+        key = (kind, record.get('currency', DEFAULT_CURRENCY), str(record['timestamp'])[:10])
+        self.ledger_sums[key] = self.ledger_sums.get(key, 0.0) - record['amount']
+        self.dirty_years.add(int(record['timestamp'][:4]))
+        self.record_changed('deleted', kind, record, -converted)
+        return record
+
+    def partition_version(self, kind, year):
+        return (self.ledger_version, self.partition_versions.get((kind, year), 0))
+
+    def bump_partition(self, kind, year):
+        self.partition_versions[(kind, year)] = self.partition_versions.get((kind, year), 0) + 1
+
+    def record_changed(self, event, kind, record, delta):
+        """Move its partition's version past a single add or delete, patch cached pivot cells in place and publish it"""
+        year = int(record['timestamp'][:4])
+        before = self.partition_version(kind, year)
+        self.bump_partition(kind, year)
+        cell = self.pivot_cache.apply(kind, record, delta, before, self.partition_version(kind, year))
+        self.events.publish(event, type=kind, record=record, delta=delta, cell=cell)
+
+    def pivot_grid(self, kind, year):
+        """Category x month grid in the base currency, rebuilt only when its partition version moved on"""
+        self.load_partitions([year])
+        grid = self.pivot_cache.get(kind, year, self.partition_version(kind, year))
+        if grid is None:
+            prefix = str(year)
+            history = self.income_history if kind == 'income' else self.spending_history
+            records = [record for record in history if record['timestamp'].startswith(prefix)]
+            grid = build_grid([r['category'] for r in records], [r['timestamp'] for r in records],
+                              self.convert_records(records))
+            self.pivot_cache.put(kind, year, self.partition_version(kind, year), grid)
+        return grid
+
+    def add_category(self, kind, category):
+        categories = self.income_categories if kind == 'income' else self.spending_categories
+        if category not in categories:
+            categories.append(category)
+            self.events.publish('category', type=kind, action='added', old=None, new=category)
+
+    def rename_category(self, kind, old, new):
+        """Rename a category across history and rules, merging into new if it already exists"""
+        categories = self.income_categories if kind == 'income' else self.spending_categories
+        history = self.income_history if kind == 'income' else self.spending_history
+        self.ensure_loaded()
+        if new in categories:
+            categories.remove(old)
+        else:
+            categories[categories.index(old)] = new
+        self.ledger_version += 1
+        renamed = 0
+        for record in history:
+            if record['category'] == old:
+                record['category'] = new
+                renamed += 1
+                self.dirty_years.add(int(record['timestamp'][:4]))
+        self.category_rules.rename_category(kind, old, new)
+        self.category_rules.save()
+        if kind == 'spending':
+            self.spending_monitor.rename(old, new)
+        self.events.publish('category', type=kind, action='renamed', old=old, new=new)
+        return renamed
+
+    def remove_category(self, kind, category):
+        """Drop a category and its rules, then run the remaining rules over the records that used it"""
+        categories = self.income_categories if kind == 'income' else self.spending_categories
+        history = self.income_history if kind == 'income' else self.spending_history
+        self.ensure_loaded()
+        categories.remove(category)
+        self.category_rules.remove_category(kind, category)
+        self.category_rules.save()
+        if kind == 'spending':
+            self.spending_monitor.remove(category)
+
+        self.ledger_version += 1
+        affected = [record for record in history if record['category'] == category]
+        suggested = self.category_rules.categorize(
+            kind, [r.get('comment', '') for r in affected], [r['amount'] for r in affected])
+        moved = 0
+        for record, new in zip(affected, suggested):
+            if new:
+                record['category'] = new
+                moved += 1
+                self.dirty_years.add(int(record['timestamp'][:4]))
+                if new not in categories:
+                    categories.append(new)
+        self.events.publish('category', type=kind, action='removed', old=category, new=None)
+        return moved, len(affected)
+
+    def money(self, value, currency=None, thousands=False):
+        return format_amount(value, currency or self.base_currency, thousands)
+
+    def to_base(self, record):
+        """Convert one record into the base currency using the cached as-of rate"""
+        currency = record.get('currency', DEFAULT_CURRENCY)
+        return record['amount'] * self.rates.rate(currency, self.base_currency, record['timestamp'])
+
+    def convert_records(self, records):
+        """Vectorized conversion of a batch of records into the base currency"""
+        if not records:
+            return np.zeros(0)
+        return self.rates.convert(
+            [r['amount'] for r in records],
+            [r.get('currency', DEFAULT_CURRENCY) for r in records],
+            to_days(r['timestamp'] for r in records),
+            self.base_currency,
+        )
+
+    def recompute_totals(self):
+        """Rebuild both totals from the per-day currency sums in one vectorized pass"""
+        self.total_income = self.total_spending = 0.0
+        if not self.ledger_sums:
+            return
+        keys = list(self.ledger_sums)
+        kinds = np.array([k[0] for k in keys])
+        converted = self.rates.convert(
+            list(self.ledger_sums.values()),
+            [k[1] for k in keys],
+            to_days(k[2] for k in keys),
+            self.base_currency,
+        )
+        self.total_income = float(converted[kinds == 'income'].sum())
+        self.total_spending = float(converted[kinds == 'spending'].sum())
+
+    def set_base_currency(self, currency):
+        if currency == self.base_currency:
+            return
+        previous = self.base_currency
+        self.base_currency = currency
+        try:
+            self.recompute_totals()
+        except KeyError as e:
+            self.base_currency = previous
+            self.recompute_totals()
+            self.base_currency_box.set(previous)
+            messagebox.showerror("Error", e.args[0])
+            return
+        # The spending statistics hold base-currency amounts, so move them to the new base as well
+        try:
+            self.spending_monitor.rescale(self.rates.rate(previous, currency, datetime.date.today()))
+        except KeyError:
+            self.spending_monitor.reset()
+            self.seed_spending_monitor()
+        self.spending_monitor.save()
+        self.ledger_version += 1
+        self.save_settings()
+        self.events.publish('reloaded')
+
+    def load_settings(self):
+        if os.path.exists(self.settings_file):
+            try:
+                with open(self.settings_file) as f:
+                    settings = json.load(f)
+                self.base_currency = settings.get('base_currency', DEFAULT_CURRENCY)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Failed to load settings: {str(e)}")
+
+    def save_settings(self):
+        with open(self.settings_file, 'w') as f:
+            json.dump({'base_currency': self.base_currency}, f, indent=2)
+
+    def refresh_totals(self):
+        """Redraw the totals labels and the chart from the current totals"""
+        self.income_label.config(text=f"Total income: {self.money(self.total_income)}")
+        self.spending_label.config(text=f"Total spending: {self.money(self.total_spending)}")
         self.update_balance_display()
         self.update_chart()
-        
-    def update_spending(self, amount):
-        self.total_spending += float(amount)
-        self.spending_label.config(text=f"Total spending: ${self.total_spending:.2f}")
+
+    def ledger_changed(self, events):
+        """Main window view: redraw only the totals a batch of events moved, and the chart once"""
+        if any(e['event'] == 'reloaded' for e in events):
+            self.refresh_totals()
+            return
+        kinds = {e['type'] for e in events if e['event'] in ('added', 'deleted')}
+        if not kinds:
+            return
+        if 'income' in kinds:
+            self.income_label.config(text=f"Total income: {self.money(self.total_income)}")
+        if 'spending' in kinds:
+            self.spending_label.config(text=f"Total spending: {self.money(self.total_spending)}")
         self.update_balance_display()
         self.update_chart()
-           
+
     def update_balance_display(self):
         balance = self.total_income - self.total_spending
-        self.balance_label.config(text=f"Current balance: ${balance:.2f}")
+        self.balance_label.config(text=f"Current balance: {self.money(balance)}")
 
     def open_income_window(self):
         income_window = tk.Toplevel(self.root)
@@ -229,36 +688,84 @@ class BudgetTracker:
         new_category_entry.pack(side=tk.LEFT, padx=(0,5))
         
         def manage_category(action):
+            # The category list itself is refreshed by categories_changed below
             if action == 'add':
                 new_cat = new_category_entry.get().strip()
                 if new_cat and new_cat not in self.income_categories:
-                    self.income_categories.append(new_cat)
-                    self.income_category_box['values'] = self.income_categories
+                    self.add_category('income', new_cat)
                     self.income_category_box.set(new_cat)
                     new_category_entry.delete(0, tk.END)
                     self.save_data()
+            elif action == 'rename':
+                new_cat = new_category_entry.get().strip()
+                current = self.income_category_box.get()
+                if new_cat and new_cat != current:
+                    self.rename_category('income', current, new_cat)
+                    new_category_entry.delete(0, tk.END)
+                    self.save_data()
             elif action == 'del':
                 if len(self.income_categories) > 1:
                     current = self.income_category_box.get()
-                    self.income_categories.remove(current)
-                    self.income_category_box['values'] = self.income_categories
-                    self.income_category_box.current(0)
+                    moved, affected = self.remove_category('income', current)
                     self.save_data()
+                    if affected:
+                        messagebox.showinfo("Category removed", f"Recategorized {moved} of {affected} '{current}' records by rule")
+        
+        def categories_changed(events):
+            # Follow categories added, renamed or removed from any window, keeping the selection if it survived
+            changes = [e for e in events if e['event'] == 'reloaded' or (e['event'] == 'category' and e['type'] == 'income')]
+            if not changes:
+                return
+            selected = category_box.get()
+            for e in changes:
+                if e['event'] == 'category' and e['action'] == 'renamed' and e['old'] == selected:
+                    selected = e['new']
+            category_box['values'] = self.income_categories
+            if selected in self.income_categories:
+                category_box.set(selected)
+            else:
+                category_box.current(0)
+        
+        category_box = self.income_category_box
+        self.events.subscribe(categories_changed, income_window)
         
         btn_frame = tk.Frame(category_frame)
         btn_frame.pack(side=tk.LEFT)
         tk.Button(btn_frame, text="+", width=2, command=lambda: manage_category('add')).pack(side=tk.LEFT)
         tk.Button(btn_frame, text="-", width=2, command=lambda: manage_category('del')).pack(side=tk.LEFT)
+        tk.Button(btn_frame, text="Rename", command=lambda: manage_category('rename')).pack(side=tk.LEFT)
         
         # Amount Section
-        tk.Label(main_frame, text="Amount ($):", font=('Arial', 10, 'bold')).grid(row=2, column=0, sticky='w', pady=(10,5))
+        tk.Label(main_frame, text="Amount:", font=('Arial', 10, 'bold')).grid(row=2, column=0, sticky='w', pady=(10,5))
         amount_entry = tk.Entry(main_frame, validate='key')
-        amount_entry.grid(row=3, column=0, sticky='ew', columnspan=3)
+        amount_entry.grid(row=3, column=0, sticky='ew', columnspan=2)
+        currency_box = ttk.Combobox(main_frame, values=self.rates.currencies(), state='readonly', width=6)
+        currency_box.set(self.base_currency)
+        currency_box.grid(row=3, column=2, sticky='e', padx=(5,0))
         
         # Comment Section
         tk.Label(main_frame, text="Comment:", font=('Arial', 10, 'bold')).grid(row=4, column=0, sticky='w', pady=(10,5))
         comment_entry = tk.Entry(main_frame)
         comment_entry.grid(row=5, column=0, sticky='ew', columnspan=3)
+        suggestion_label = tk.Label(main_frame, text="", fg='gray')
+        suggestion_label.grid(row=4, column=1, columnspan=2, sticky='e', pady=(10,5))
+        
+        # Rules pick the category from the comment until the user picks one by hand
+        category_picked = [False]
+        self.income_category_box.bind("<<ComboboxSelected>>", lambda e: category_picked.__setitem__(0, True))
+        
+        def suggest_category(event=None):
+            try:
+                amount = float(amount_entry.get())
+            except ValueError:
+                amount = 0.0
+            suggestion = self.category_rules.suggest('income', comment_entry.get(), amount)
+            suggestion_label.config(text=f"Suggested: {suggestion}" if suggestion else "")
+            if suggestion and not category_picked[0]:
+                self.income_category_box.set(suggestion)
+        
+        comment_entry.bind("<KeyRelease>", suggest_category)
+        amount_entry.bind("<KeyRelease>", suggest_category)
         
         # Button Section
         button_frame = tk.Frame(main_frame)
@@ -272,17 +779,16 @@ class BudgetTracker:
                 category = self.income_category_box.get()
                 comment = comment_entry.get().strip()
                 
-                self.update_income(amount)
-                self.income_history.append({
-                    'category': category,
-                    'amount': amount,
-                    'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'comment': comment
-                })
-                
+                try:
+                    self.add_record('income', category, amount, comment, currency=currency_box.get())
+                except KeyError as e:
+                    messagebox.showerror("Error", e.args[0])
+                    return
                 self.save_data()
                 amount_entry.delete(0, tk.END)
                 comment_entry.delete(0, tk.END)
+                suggestion_label.config(text="")
+                category_picked[0] = False
                 amount_entry.focus()
                 
             except ValueError:
@@ -295,14 +801,22 @@ class BudgetTracker:
         main_frame.rowconfigure(6, weight=1)
         amount_entry.focus()
 
-    def show_income_history(self):
+    def show_income_history(self, category=None, period=None):
+        """History timeline, optionally narrowed to one category and/or a YYYY or YYYY-MM period"""
         history_window = tk.Toplevel(self.root)
-        history_window.title("Income History Timeline")
+        title = "Income History Timeline"
+        if category or period:
+            title += " - " + " ".join(part for part in (category, period) if part)
+        history_window.title(title)
+        if period:
+            self.ensure_loaded(f"{period[:4]}-01-01", f"{period[:4]}-12-31")
+        else:
+            self.ensure_loaded()
         history_window.geometry("750x400")
         
-        if not self.income_history:
-            tk.Label(history_window, text="No income history available").pack(pady=20)
-            return
+        def matches(record):
+            return (category is None or record['category'] == category) \
+                and (period is None or record['timestamp'].startswith(period))
             
         container = tk.Frame(history_window)
         container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -325,39 +839,98 @@ class BudgetTracker:
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
+        empty_label = tk.Label(scrollable_frame, text="No income history available")
         
-        def delete_income_record(index):
+        rows = {}  # id(record) -> (record, row frame, category label), newest row on top
+        shown_total = [0.0]
+        
+        def delete_income_record(record):
             if messagebox.askyesno("Confirm", "Delete this income record?"):
-                # Update totals
-                self.total_income -= self.income_history[index]['amount']
-                # Remove record
-                del self.income_history[index]
-                # Save changes
+                # The record's row, the totals and the chart follow from the 'deleted' event
+                index = next(i for i, r in enumerate(self.income_history) if r is record)
+                self.delete_record('income', index)
                 self.save_data()
-                # Update main display
-                self.income_label.config(text=f"Total income: ${self.total_income:.2f}")
-                self.update_balance_display()
-                self.update_chart()
-                # Refresh history view
-                history_window.destroy()
-                self.show_income_history()
-        
-        for idx, record in enumerate(reversed(self.income_history)):
+        
+        def add_row(record, before=None):
             entry_frame = tk.Frame(scrollable_frame)
-            entry_frame.pack(fill=tk.X, pady=2)
+            entry_frame.pack(fill=tk.X, pady=2, before=before)
             
             tk.Label(entry_frame, text=record['timestamp'], width=15, anchor='w').pack(side=tk.LEFT)
-            tk.Label(entry_frame, text=record['category'], width=15, anchor='w').pack(side=tk.LEFT)
-            tk.Label(entry_frame, text=f"${record['amount']:.2f}", width=15, anchor='e').pack(side=tk.LEFT)
+            category_label = tk.Label(entry_frame, text=record['category'], width=15, anchor='w')
+            category_label.pack(side=tk.LEFT)
+            tk.Label(entry_frame, text=self.money(record['amount'], record.get('currency')), width=15, anchor='e').pack(side=tk.LEFT)
             tk.Label(entry_frame, text=record.get('comment', ''), width=20, anchor='w').pack(side=tk.LEFT)
-            tk.Button(entry_frame, text="Delete", width=8, command=lambda i=idx: delete_income_record(len(self.income_history)-1-i)).pack(side=tk.LEFT, padx=5)
+            tk.Button(entry_frame, text="Delete", width=8, command=lambda: delete_income_record(record)).pack(side=tk.LEFT, padx=5)
+            rows[id(record)] = (record, entry_frame, category_label)
+        
+        def row_below(record):
+            # Rows run newest first, so a new row goes just above the nearest older record on show
+            for older in self.preceding_records('income', record):
+                if id(older) in rows:
+                    return rows[id(older)][1]
+            return None
+        
+        def remove_row(record):
+            rows.pop(id(record))[1].destroy()
+        
+        def render_total():
+            if rows:
+                empty_label.pack_forget()
+            else:
+                empty_label.pack(pady=20)
+            total_label.config(text=self.money(shown_total[0]))
+        
+        def fill():
+            for _, entry_frame, _ in rows.values():
+                entry_frame.destroy()
+            rows.clear()
+            for record in reversed(self.income_history):
+                if matches(record):
+                    add_row(record)
+            shown_total[0] = self.total_income if len(rows) == len(self.income_history) else \
+                float(self.convert_records([record for record, _, _ in rows.values()]).sum())
+            render_total()
+        
+        def ledger_changed(events):
+            # New, deleted and recategorized records touch their own rows only; a reload refills the list
+            nonlocal category
+            if any(e['event'] == 'reloaded' for e in events):
+                fill()
+                return
+            events = [e for e in events if e['type'] == 'income']
+            if not events:
+                return
+            for e in events:
+                if e['event'] == 'added' and matches(e['record']):
+                    add_row(e['record'], before=row_below(e['record']))
+                    shown_total[0] += e['delta']
+                elif e['event'] == 'deleted' and id(e['record']) in rows:
+                    remove_row(e['record'])
+                    shown_total[0] += e['delta']
+                elif e['event'] == 'category' and e['action'] != 'added':
+                    if category not in (None, e['old']) and (e['action'] == 'removed' or e['new'] == category):
+                        fill()  # Records may have moved into this category; the rest of the batch is in the ledger already
+                        return
+                    if e['action'] == 'renamed' and category == e['old']:
+                        category = e['new']  # The window follows its category to the new name
+                        history_window.title(history_window.title().replace(e['old'], e['new'], 1))
+                    for record, _, category_label in list(rows.values()):
+                        if not matches(record):
+                            remove_row(record)
+                            shown_total[0] -= self.to_base(record)
+                        elif category_label.cget('text') != record['category']:
+                            category_label.config(text=record['category'])
+            render_total()
         
         total_frame = tk.Frame(container)
         total_frame.pack(fill=tk.X, pady=(10,0))
         tk.Label(total_frame, text="Total Income:", font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=(20,0))
-        tk.Label(total_frame, text=f"${self.total_income:.2f}", font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=5)
+        total_label = tk.Label(total_frame, text="", font=('Arial', 9, 'bold'))
+        total_label.pack(side=tk.LEFT, padx=5)
         
         tk.Button(container, text="Close", command=history_window.destroy).pack(pady=(10,0))
+        fill()
+        self.events.subscribe(ledger_changed, history_window)
 
     def open_spending_window(self):
         spending_window = tk.Toplevel(self.root)
@@ -382,36 +955,104 @@ class BudgetTracker:
         new_category_entry.pack(side=tk.LEFT, padx=(0,5))
         
         def manage_category(action):
+            # The category list itself is refreshed by categories_changed below
             if action == 'add':
                 new_cat = new_category_entry.get().strip()
                 if new_cat and new_cat not in self.spending_categories:
-                    self.spending_categories.append(new_cat)
-                    self.spending_category_box['values'] = self.spending_categories
+                    self.add_category('spending', new_cat)
                     self.spending_category_box.set(new_cat)
                     new_category_entry.delete(0, tk.END)
                     self.save_data()
+            elif action == 'rename':
+                new_cat = new_category_entry.get().strip()
+                current = self.spending_category_box.get()
+                if new_cat and new_cat != current:
+                    self.rename_category('spending', current, new_cat)
+                    new_category_entry.delete(0, tk.END)
+                    self.save_data()
             elif action == 'del':
                 if len(self.spending_categories) > 1:
                     current = self.spending_category_box.get()
-                    self.spending_categories.remove(current)
-                    self.spending_category_box['values'] = self.spending_categories
-                    self.spending_category_box.current(0)
+                    moved, affected = self.remove_category('spending', current)
                     self.save_data()
+                    if affected:
+                        messagebox.showinfo("Category removed", f"Recategorized {moved} of {affected} '{current}' records by rule")
+        
+        def categories_changed(events):
+            # Follow categories added, renamed or removed from any window, keeping the selection if it survived
+            changes = [e for e in events if e['event'] == 'reloaded' or (e['event'] == 'category' and e['type'] == 'spending')]
+            if not changes:
+                return
+            selected = category_box.get()
+            for e in changes:
+                if e['event'] == 'category' and e['action'] == 'renamed' and e['old'] == selected:
+                    selected = e['new']
+            category_box['values'] = self.spending_categories
+            if selected in self.spending_categories:
+                category_box.set(selected)
+            else:
+                category_box.current(0)
+        
+        category_box = self.spending_category_box
+        self.events.subscribe(categories_changed, spending_window)
         
         btn_frame = tk.Frame(category_frame)
         btn_frame.pack(side=tk.LEFT)
         tk.Button(btn_frame, text="+", width=2, command=lambda: manage_category('add')).pack(side=tk.LEFT)
         tk.Button(btn_frame, text="-", width=2, command=lambda: manage_category('del')).pack(side=tk.LEFT)
+        tk.Button(btn_frame, text="Rename", command=lambda: manage_category('rename')).pack(side=tk.LEFT)
         
         # Amount Section
-        tk.Label(main_frame, text="Amount ($):", font=('Arial', 10, 'bold')).grid(row=2, column=0, sticky='w', pady=(10,5))
+        tk.Label(main_frame, text="Amount:", font=('Arial', 10, 'bold')).grid(row=2, column=0, sticky='w', pady=(10,5))
         amount_entry = tk.Entry(main_frame, validate='key')
-        amount_entry.grid(row=3, column=0, sticky='ew', columnspan=3)
+        amount_entry.grid(row=3, column=0, sticky='ew', columnspan=2)
+        currency_box = ttk.Combobox(main_frame, values=self.rates.currencies(), state='readonly', width=6)
+        currency_box.set(self.base_currency)
+        currency_box.grid(row=3, column=2, sticky='e', padx=(5,0))
         
         # Comment Section
         tk.Label(main_frame, text="Comment:", font=('Arial', 10, 'bold')).grid(row=4, column=0, sticky='w', pady=(10,5))
         comment_entry = tk.Entry(main_frame)
         comment_entry.grid(row=5, column=0, sticky='ew', columnspan=3)
+        suggestion_label = tk.Label(main_frame, text="", fg='gray')
+        suggestion_label.grid(row=4, column=1, columnspan=2, sticky='e', pady=(10,5))
+        
+        anomaly_label = tk.Label(main_frame, text="", fg='#C62828', wraplength=360, justify='left')
+        anomaly_label.grid(row=7, column=0, columnspan=3, sticky='w', pady=(10,0))
+        
+        # Rules pick the category from the comment until the user picks one by hand
+        category_picked = [False]
+        
+        def check_amount(event=None):
+            try:
+                amount = float(amount_entry.get())
+                amount *= self.rates.rate(currency_box.get(), self.base_currency, datetime.date.today())
+            except (ValueError, KeyError):
+                anomaly_label.config(text="")
+                return
+            reason = self.spending_monitor.check(self.spending_category_box.get(), amount)
+            anomaly_label.config(text=f"Unusual amount: {reason}" if reason else "")
+        
+        def pick_category(event=None):
+            category_picked[0] = True
+            check_amount()
+        
+        self.spending_category_box.bind("<<ComboboxSelected>>", pick_category)
+        currency_box.bind("<<ComboboxSelected>>", check_amount)
+        
+        def suggest_category(event=None):
+            try:
+                amount = float(amount_entry.get())
+            except ValueError:
+                amount = 0.0
+            suggestion = self.category_rules.suggest('spending', comment_entry.get(), amount)
+            suggestion_label.config(text=f"Suggested: {suggestion}" if suggestion else "")
+            if suggestion and not category_picked[0]:
+                self.spending_category_box.set(suggestion)
+            check_amount()
+        
+        comment_entry.bind("<KeyRelease>", suggest_category)
+        amount_entry.bind("<KeyRelease>", suggest_category)
         
         # Button Section
         button_frame = tk.Frame(main_frame)
@@ -425,17 +1066,20 @@ class BudgetTracker:
                 category = self.spending_category_box.get()
                 comment = comment_entry.get().strip()
                 
-                self.update_spending(amount)
-                self.spending_history.append({
-                    'category': category,
-                    'amount': amount,
-                    'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'comment': comment
-                })
-                
+                try:
+                    record = self.add_record('spending', category, amount, comment, currency=currency_box.get())
+                except KeyError as e:
+                    messagebox.showerror("Error", e.args[0])
+                    return
                 self.save_data()
                 amount_entry.delete(0, tk.END)
                 comment_entry.delete(0, tk.END)
+                suggestion_label.config(text="")
+                if self.spending_monitor.is_flagged(record):
+                    anomaly_label.config(text=f"Saved, flagged as unusual for {category}: {self.money(amount, record['currency'])}")
+                else:
+                    anomaly_label.config(text="")
+                category_picked[0] = False
                 amount_entry.focus()
                 
             except ValueError:
@@ -448,14 +1092,22 @@ class BudgetTracker:
         main_frame.rowconfigure(6, weight=1)
         amount_entry.focus()
 
-    def show_spending_history(self):
+    def show_spending_history(self, category=None, period=None):
+        """History timeline, optionally narrowed to one category and/or a YYYY or YYYY-MM period"""
         history_window = tk.Toplevel(self.root)
-        history_window.title("Spending History Timeline")
+        title = "Spending History Timeline"
+        if category or period:
+            title += " - " + " ".join(part for part in (category, period) if part)
+        history_window.title(title)
+        if period:
+            self.ensure_loaded(f"{period[:4]}-01-01", f"{period[:4]}-12-31")
+        else:
+            self.ensure_loaded()
         history_window.geometry("750x400")
         
-        if not self.spending_history:
-            tk.Label(history_window, text="No spending history available").pack(pady=20)
-            return
+        def matches(record):
+            return (category is None or record['category'] == category) \
+                and (period is None or record['timestamp'].startswith(period))
             
         container = tk.Frame(history_window)
         container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -478,41 +1130,635 @@ class BudgetTracker:
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
+        empty_label = tk.Label(scrollable_frame, text="No spending history available")
+        
+        rows = {}  # id(record) -> (record, row frame, category label), newest row on top
+        shown_total = [0.0]
         
-        def delete_spending_record(index):
+        def delete_spending_record(record):
             if messagebox.askyesno("Confirm", "Delete this spending record?"):
-                # Update totals
-                self.total_spending -= self.spending_history[index]['amount']
-                # Remove record
-                del self.spending_history[index]
-                # Save changes
+                # The record's row, the totals and the chart follow from the 'deleted' event
+                index = next(i for i, r in enumerate(self.spending_history) if r is record)
+                self.delete_record('spending', index)
                 self.save_data()
-                # Update main display
-                self.spending_label.config(text=f"Total spending: ${self.total_spending:.2f}")
-                self.update_balance_display()
-                self.update_chart()
-                # Refresh history view
-                history_window.destroy()
-                self.show_spending_history()
-        
-        for idx, record in enumerate(reversed(self.spending_history)):
-            entry_frame = tk.Frame(scrollable_frame)
-            entry_frame.pack(fill=tk.X, pady=2)
+        
+        def add_row(record, before=None):
+            # Highlight records the spending monitor flagged as unusual when they were entered
+            style = {'bg': '#F8D7DA'} if self.spending_monitor.is_flagged(record) else {}
+            entry_frame = tk.Frame(scrollable_frame, **style)
+            entry_frame.pack(fill=tk.X, pady=2, before=before)
             
-            tk.Label(entry_frame, text=record['timestamp'], width=15, anchor='w').pack(side=tk.LEFT)
-            tk.Label(entry_frame, text=record['category'], width=15, anchor='w').pack(side=tk.LEFT)
-            tk.Label(entry_frame, text=f"${record['amount']:.2f}", width=15, anchor='e').pack(side=tk.LEFT)
-            tk.Label(entry_frame, text=record.get('comment', ''), width=20, anchor='w').pack(side=tk.LEFT)
-            tk.Button(entry_frame, text="Delete", width=8, command=lambda i=idx: delete_spending_record(len(self.spending_history)-1-i)).pack(side=tk.LEFT, padx=5)
+            tk.Label(entry_frame, text=record['timestamp'], width=15, anchor='w', **style).pack(side=tk.LEFT)
+            category_label = tk.Label(entry_frame, text=record['category'], width=15, anchor='w', **style)
+            category_label.pack(side=tk.LEFT)
+            tk.Label(entry_frame, text=self.money(record['amount'], record.get('currency')), width=15, anchor='e', **style).pack(side=tk.LEFT)
+            tk.Label(entry_frame, text=record.get('comment', ''), width=20, anchor='w', **style).pack(side=tk.LEFT)
+            tk.Button(entry_frame, text="Delete", width=8, command=lambda: delete_spending_record(record)).pack(side=tk.LEFT, padx=5)
+            rows[id(record)] = (record, entry_frame, category_label)
+        
+        def row_below(record):
+            # Rows run newest first, so a new row goes just above the nearest older record on show
+            for older in self.preceding_records('spending', record):
+                if id(older) in rows:
+                    return rows[id(older)][1]
+            return None
+        
+        def remove_row(record):
+            rows.pop(id(record))[1].destroy()
+        
+        def render_total():
+            if rows:
+                empty_label.pack_forget()
+            else:
+                empty_label.pack(pady=20)
+            total_label.config(text=self.money(shown_total[0]))
+        
+        def fill():
+            for _, entry_frame, _ in rows.values():
+                entry_frame.destroy()
+            rows.clear()
+            for record in reversed(self.spending_history):
+                if matches(record):
+                    add_row(record)
+            shown_total[0] = self.total_spending if len(rows) == len(self.spending_history) else \
+                float(self.convert_records([record for record, _, _ in rows.values()]).sum())
+            render_total()
+        
+        def ledger_changed(events):
+            # New, deleted and recategorized records touch their own rows only; a reload refills the list
+            nonlocal category
+            if any(e['event'] == 'reloaded' for e in events):
+                fill()
+                return
+            events = [e for e in events if e['type'] == 'spending']
+            if not events:
+                return
+            for e in events:
+                if e['event'] == 'added' and matches(e['record']):
+                    add_row(e['record'], before=row_below(e['record']))
+                    shown_total[0] += e['delta']
+                elif e['event'] == 'deleted' and id(e['record']) in rows:
+                    remove_row(e['record'])
+                    shown_total[0] += e['delta']
+                elif e['event'] == 'category' and e['action'] != 'added':
+                    if category not in (None, e['old']) and (e['action'] == 'removed' or e['new'] == category):
+                        fill()  # Records may have moved into this category; the rest of the batch is in the ledger already
+                        return
+                    if e['action'] == 'renamed' and category == e['old']:
+                        category = e['new']  # The window follows its category to the new name
+                        history_window.title(history_window.title().replace(e['old'], e['new'], 1))
+                    for record, _, category_label in list(rows.values()):
+                        if not matches(record):
+                            remove_row(record)
+                            shown_total[0] -= self.to_base(record)
+                        elif category_label.cget('text') != record['category']:
+                            category_label.config(text=record['category'])
+            render_total()
         
         total_frame = tk.Frame(container)
         total_frame.pack(fill=tk.X, pady=(10,0))
         tk.Label(total_frame, text="Total Spending:", font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=(20,0))
-        tk.Label(total_frame, text=f"${self.total_spending:.2f}", font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=5)
+        total_label = tk.Label(total_frame, text="", font=('Arial', 9, 'bold'))
+        total_label.pack(side=tk.LEFT, padx=5)
         
         tk.Button(container, text="Close", command=history_window.destroy).pack(pady=(10,0))
+        fill()
+        self.events.subscribe(ledger_changed, history_window)
+
+    def parse_batch_row(self, values):
+        """Validate one (type, category, amount, comment, date) row and return add_record arguments"""
+        kind, category, amount, comment, date = (str(v).strip() for v in values)
+        kind = kind.lower()
+        if kind not in ('income', 'spending'):
+            raise ValueError("type must be income or spending")
+        try:
+            amount = float(amount.replace(",", "").lstrip("$"))
+        except ValueError:
+            raise ValueError("amount is not a number")
+        if not math.isfinite(amount):  # float() also accepts "nan" and "inf"
+            raise ValueError("amount is not a number")
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        timestamp = None
+        if date:
+            try:
+                parsed = datetime.datetime.strptime(date, "%Y-%m-%d %H:%M:%S" if " " in date else "%Y-%m-%d")
+            except ValueError:
+                raise ValueError("date must be YYYY-MM-DD")
+            timestamp = parsed.strftime("%Y-%m-%d %H:%M:%S")
+        if not category:
+            category = self.category_rules.suggest(kind, comment, amount)
+            if not category:
+                raise ValueError("category is required when no rule matches")
+        return kind, category, amount, comment, timestamp
+
+    def open_batch_window(self):
+        batch_window = tk.Toplevel(self.root)
+        batch_window.title("Batch Entry")
+        batch_window.geometry("800x500")
+        
+        columns = ('type', 'category', 'amount', 'comment', 'date')
+        
+        container = tk.Frame(batch_window, padx=10, pady=10)
+        container.pack(fill=tk.BOTH, expand=True)
+        
+        tk.Label(container, text="Double-click a cell to edit. Paste tab- or comma-separated rows: type, category, amount, comment, date",
+                 font=('Arial', 9)).pack(anchor='w', pady=(0,5))
+        
+        table_frame = tk.Frame(container)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        table = ttk.Treeview(table_frame, columns=columns, show='headings', selectmode='extended')
+        for column, width in zip(columns, (80, 120, 90, 250, 130)):
+            table.heading(column, text=column.capitalize())
+            table.column(column, width=width, anchor='e' if column == 'amount' else 'w')
+        table.tag_configure('invalid', background='#F8D7DA')
+        scrollbar = tk.Scrollbar(table_frame, orient="vertical", command=table.yview)
+        table.configure(yscrollcommand=scrollbar.set)
+        table.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        status_label = tk.Label(container, text="", anchor='w')
+        status_label.pack(fill=tk.X, pady=(5,0))
+        
+        def add_row(values=('spending', '', '', '', '')):
+            return table.insert('', tk.END, values=values)
+        
+        def edit_cell(event):
+            row = table.identify_row(event.y)
+            column = table.identify_column(event.x)
+            if not row or not column:
+                return
+            col_index = int(column[1:]) - 1
+            x, y, width, height = table.bbox(row, column)
+            editor = tk.Entry(table)
+            editor.insert(0, table.set(row, columns[col_index]))
+            editor.select_range(0, tk.END)
+            editor.place(x=x, y=y, width=width, height=height)
+            editor.focus()
+            
+            def finish(event=None):
+                table.set(row, columns[col_index], editor.get())
+                table.item(row, tags=())
+                editor.destroy()
+            
+            editor.bind("<Return>", finish)
+            editor.bind("<FocusOut>", finish)
+            editor.bind("<Escape>", lambda e: editor.destroy())
+        
+        def paste_rows(event=None):
+            try:
+                text = batch_window.clipboard_get()
+            except tk.TclError:
+                return
+            delimiter = "\t" if "\t" in text else ","
+            added = 0
+            # csv keeps quoted commas ("1,234.50", comments) inside their cell
+            for cells in csv.reader(io.StringIO(text), delimiter=delimiter):
+                cells = [cell.strip() for cell in cells]
+                if not any(cells):
+                    continue
+                if added == 0 and cells and cells[0].lower() == 'type':
+                    continue  # Header row copied along with the data
+                cells = (cells + [''] * len(columns))[:len(columns)]
+                add_row(cells)
+                added += 1
+            status_label.config(text=f"Pasted {added} rows")
+            return "break"
+        
+        def delete_rows():
+            table.delete(*table.selection())
+        
+        def commit():
+            rows = table.get_children()
+            parsed = []
+            invalid = 0
+            first_error = ""
+            for row in rows:
+                values = table.item(row, 'values')
+                if not any(str(v).strip() for v in values[1:]):
+                    continue  # Untouched blank row
+                try:
+                    parsed.append(self.parse_batch_row(values))
+                    table.item(row, tags=())
+                except ValueError as e:
+                    invalid += 1
+                    first_error = first_error or str(e)
+                    table.item(row, tags=('invalid',))
+            if not parsed and not invalid:
+                return
+            if invalid:
+                status_label.config(text=f"{invalid} invalid rows, nothing saved (first problem: {first_error})")
+                return
+            
+            # One unit: every record in memory and one write; the views redraw once from the batched events
+            for args in parsed:
+                self.add_record(*args)
+            self.save_data()
+            table.delete(*rows)
+            status_label.config(text=f"Saved {len(parsed)} transactions")
+        
+        table.bind("<Double-1>", edit_cell)
+        batch_window.bind("<Control-v>", paste_rows)
+        batch_window.bind("<Command-v>", paste_rows)
+        
+        button_frame = tk.Frame(container)
+        button_frame.pack(pady=(10,0))
+        tk.Button(button_frame, text="Add Row", command=add_row).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Paste", command=paste_rows).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Delete Rows", command=delete_rows).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Commit", command=commit).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=batch_window.destroy).pack(side=tk.LEFT, padx=5)
+        
+        for _ in range(10):
+            add_row()
+
+    def open_reconcile_window(self):
+        reconcile_window = tk.Toplevel(self.root)
+        reconcile_window.title("Bank Reconciliation")
+        reconcile_window.geometry("800x500")
+        
+        container = tk.Frame(reconcile_window, padx=10, pady=10)
+        container.pack(fill=tk.BOTH, expand=True)
+        
+        options_frame = tk.Frame(container)
+        options_frame.pack(fill=tk.X)
+        tk.Label(options_frame, text="Date window (± days):").pack(side=tk.LEFT)
+        days_entry = tk.Entry(options_frame, width=5)
+        days_entry.insert(0, "3")
+        days_entry.pack(side=tk.LEFT, padx=(0,10))
+        tk.Label(options_frame, text="Amount tolerance:").pack(side=tk.LEFT)
+        tolerance_entry = tk.Entry(options_frame, width=8)
+        tolerance_entry.insert(0, "0.01")
+        tolerance_entry.pack(side=tk.LEFT, padx=(0,10))
+        
+        summary_label = tk.Label(container, text="Load a bank statement CSV (date, amount or debit/credit, description)", anchor='w')
+        summary_label.pack(fill=tk.X, pady=(10,5))
+        
+        notebook = ttk.Notebook(container)
+        notebook.pack(fill=tk.BOTH, expand=True)
+        tables = {}
+        for name, columns in (('Matched', ('ledger_date', 'bank_date', 'amount', 'category', 'description')),
+                              ('Ledger only', ('date', 'type', 'category', 'amount', 'comment')),
+                              ('Bank only', ('date', 'amount', 'description'))):
+            frame = tk.Frame(notebook)
+            table = ttk.Treeview(frame, columns=columns, show='headings')
+            for column in columns:
+                table.heading(column, text=column.replace('_', ' ').capitalize())
+                table.column(column, width=120, anchor='e' if column == 'amount' else 'w')
+            scrollbar = tk.Scrollbar(frame, orient="vertical", command=table.yview)
+            table.configure(yscrollcommand=scrollbar.set)
+            table.pack(side="left", fill="both", expand=True)
+            scrollbar.pack(side="right", fill="y")
+            notebook.add(frame, text=name)
+            tables[name] = table
+        
+        def run():
+            path = filedialog.askopenfilename(parent=reconcile_window, title="Bank statement",
+                                              filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+            if not path:
+                return
+            try:
+                days = int(days_entry.get())
+                tolerance = float(tolerance_entry.get())
+                bank = load_statement(path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Failed to read statement: {str(e)}", parent=reconcile_window)
+                return
+            if bank.empty:
+                summary_label.config(text="The statement has no transactions")
+                return
+            
+            # Only ledger records within the statement's period (plus the date window) take part
+            start = (datetime.date.fromisoformat(bank['date'].min()) - datetime.timedelta(days=days)).isoformat()
+            end = (datetime.date.fromisoformat(bank['date'].max()) + datetime.timedelta(days=days)).isoformat()
+            self.ensure_loaded(start, end)
+            records = []
+            rows = []
+            for kind, history in (('income', self.income_history), ('spending', self.spending_history)):
+                for record in history:
+                    day = record['timestamp'][:10]
+                    if start <= day <= end:
+                        records.append(record)
+                        rows.append((day, kind, record['category'], record.get('comment', '')))
+            ledger = pd.DataFrame(rows, columns=['date', 'type', 'category', 'comment'])
+            # The statement is in the base currency, so foreign-currency records are converted before matching
+            signs = np.where(ledger['type'] == 'income', 1.0, -1.0)
+            ledger['amount'] = signs * self.convert_records(records)
+            
+            matched, ledger_only, bank_only = reconcile(ledger, bank, days, tolerance)
+            
+            for table in tables.values():
+                table.delete(*table.get_children())
+            for l, b in matched:
+                tables['Matched'].insert('', tk.END, values=(ledger.at[l, 'date'], bank.at[b, 'date'], f"{bank.at[b, 'amount']:.2f}",
+                                                             ledger.at[l, 'category'], bank.at[b, 'description']))
+            for l in ledger_only:
+                tables['Ledger only'].insert('', tk.END, values=(ledger.at[l, 'date'], ledger.at[l, 'type'], ledger.at[l, 'category'],
+                                                                 f"{ledger.at[l, 'amount']:.2f}", ledger.at[l, 'comment']))
+            for b in bank_only:
+                tables['Bank only'].insert('', tk.END, values=(bank.at[b, 'date'], f"{bank.at[b, 'amount']:.2f}", bank.at[b, 'description']))
+            summary_label.config(text=f"{start} to {end}: {len(matched)} matched, "
+                                      f"{len(ledger_only)} ledger only, {len(bank_only)} bank only")
+        
+        button_frame = tk.Frame(container)
+        button_frame.pack(pady=(10,0))
+        tk.Button(button_frame, text="Load Statement...", command=run).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=reconcile_window.destroy).pack(side=tk.LEFT, padx=5)
+
+    def open_pivot_window(self):
+        pivot_window = tk.Toplevel(self.root)
+        pivot_window.title("Category by Month")
+        pivot_window.geometry("1000x450")
+        
+        container = tk.Frame(pivot_window, padx=10, pady=10)
+        container.pack(fill=tk.BOTH, expand=True)
+        
+        this_year = datetime.date.today().year
+        years = sorted(set(self.partition_summaries) | {this_year}, reverse=True)
+        year_frame = tk.Frame(container)
+        year_frame.pack(fill=tk.X)
+        tk.Label(year_frame, text="Year:").pack(side=tk.LEFT)
+        year_box = ttk.Combobox(year_frame, values=years, state='readonly', width=6)
+        year_box.set(this_year)
+        year_box.pack(side=tk.LEFT, padx=5)
+        tk.Label(year_frame, text="Double-click a cell to see its records", fg='gray').pack(side=tk.RIGHT)
+        
+        columns = ['category'] + [str(m) for m in MONTHS] + ['total']
+        notebook = ttk.Notebook(container)
+        notebook.pack(fill=tk.BOTH, expand=True, pady=(10,0))
+        tables = {}
+        for kind in ('income', 'spending'):
+            frame = tk.Frame(notebook)
+            table = ttk.Treeview(frame, columns=columns, show='headings')
+            table.heading('category', text="Category")
+            table.column('category', width=120, anchor='w')
+            for month in MONTHS:
+                table.heading(str(month), text=MONTH_NAMES[month - 1])
+                table.column(str(month), width=65, anchor='e')
+            table.heading('total', text="Total")
+            table.column('total', width=85, anchor='e')
+            table.tag_configure('total', font=('Arial', 9, 'bold'))
+            scrollbar = tk.Scrollbar(frame, orient="vertical", command=table.yview)
+            table.configure(yscrollcommand=scrollbar.set)
+            table.pack(side="left", fill="both", expand=True)
+            scrollbar.pack(side="right", fill="y")
+            notebook.add(frame, text=kind.capitalize())
+            tables[kind] = table
+        
+        def row_values(label, cells):
+            return [label] + [f"{value:,.2f}" for value in cells] + [f"{sum(cells):,.2f}"]
+        
+        def render_totals(kind, grid):
+            tables[kind].item('__total__', values=row_values("Total", list(grid.sum(axis=0))))
+        
+        def render(event=None):
+            year = int(year_box.get())
+            for kind, table in tables.items():
+                grid = self.pivot_grid(kind, year)
+                table.delete(*table.get_children())
+                for category in sorted(grid.index):
+                    table.insert('', tk.END, iid=category, values=row_values(category, list(grid.loc[category])))
+                table.insert('', tk.END, iid='__total__', values=(), tags=('total',))
+                render_totals(kind, grid)
+        
+        def ledger_changed(events):
+            # Patched cells redraw their row and the totals row; renames, removals and reloads re-render
+            year = int(year_box.get())
+            touched = {}
+            for e in events:
+                if e['event'] == 'reloaded' or (e['event'] == 'category' and e['action'] != 'added'):
+                    render()
+                    return
+                if e['event'] == 'category' or int(e['record']['timestamp'][:4]) != year:
+                    continue
+                if e['cell'] is None:
+                    render()  # The grid was not current, so it has to be rebuilt anyway
+                    return
+                touched.setdefault(e['type'], set()).add(e['cell'][1])
+            for kind, categories in touched.items():
+                grid = self.pivot_grid(kind, year)
+                table = tables[kind]
+                for category in categories:
+                    if category not in grid.index:
+                        if table.exists(category):
+                            table.delete(category)  # Its last record this year was deleted
+                        continue
+                    values = row_values(category, list(grid.loc[category]))
+                    if table.exists(category):
+                        table.item(category, values=values)
+                    else:
+                        # Keep the alphabetical order render() uses
+                        position = sorted(grid.index).index(category)
+                        table.insert('', position, iid=category, values=values)
+                render_totals(kind, grid)
+        
+        def open_cell(event):
+            table = event.widget
+            kind = 'income' if table is tables['income'] else 'spending'
+            row = table.identify_row(event.y)
+            column = table.identify_column(event.x)
+            if not row or not column:
+                return
+            column_name = columns[int(column[1:]) - 1]
+            category = None if row == '__total__' else row
+            period = year_box.get()
+            if column_name.isdigit():
+                period += f"-{int(column_name):02d}"
+            if kind == 'income':
+                self.show_income_history(category, period)
+            else:
+                self.show_spending_history(category, period)
+        
+        for table in tables.values():
+            table.bind("<Double-1>", open_cell)
+        year_box.bind("<<ComboboxSelected>>", render)
+        self.events.subscribe(ledger_changed, pivot_window)
+        render()
+
+    def export_ledger_archive(self):
+        path = filedialog.asksaveasfilename(title="Export archive", defaultextension=".gz",
+                                            filetypes=[("gzip archive", "*.gz"), ("xz archive", "*.xz")])
+        if not path:
+            return
+        try:
+            self.save_data()  # The archive streams from the partitions on disk
+            self.root.config(cursor="watch")
+            self.root.update_idletasks()
+            rows = export_archive(self.store, path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to export archive: {str(e)}")
+            return
+        finally:
+            self.root.config(cursor="")
+        ledger_size = sum(os.path.getsize(self.store.path(year)) for year in self.store.years())
+        archive_size = os.path.getsize(path)
+        messagebox.showinfo("Export Archive", f"Archived {rows} transactions\n"
+                                              f"{ledger_size / 1024:,.0f} KB ledger -> {archive_size / 1024:,.0f} KB archive")
+
+    def import_ledger_archive(self):
+        path = filedialog.askopenfilename(title="Import archive",
+                                          filetypes=[("Ledger archives", "*.gz *.xz"), ("All files", "*.*")])
+        if not path:
+            return
+        if not messagebox.askyesno("Import Archive", "Replace the current ledger with this archive?\n"
+                                                      "The current data is kept as a backup folder."):
+            return
+        
+        # Build the new partitions beside the live ones and only swap once the whole archive checked out
+        staging = self.store.directory + ".importing"
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            self.root.config(cursor="watch")
+            self.root.update_idletasks()
+            rows = import_archive(path, staging)
+        except Exception as e:
+            # Damaged archives fail in many ways (zlib.error, lzma.LZMAError, bad JSON, checksums): report them all
+            shutil.rmtree(staging, ignore_errors=True)
+            messagebox.showerror("Error", f"Failed to import archive: {str(e)}")
+            return
+        finally:
+            self.root.config(cursor="")
+        
+        if os.path.isdir(self.store.directory):
+            backup = f"{self.store.directory}.backup-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            os.replace(self.store.directory, backup)
+        os.replace(staging, self.store.directory)
+        self.reload_ledger()
+        messagebox.showinfo("Import Archive", f"Imported {rows} transactions")
+
+    def open_report_window(self):
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Export Report")
+        report_window.geometry("380x170")
+        
+        container = tk.Frame(report_window, padx=10, pady=10)
+        container.pack(fill=tk.BOTH, expand=True)
+        
+        this_year = datetime.date.today().year
+        years = sorted(set(self.partition_summaries) | {this_year})
+        range_frame = tk.Frame(container)
+        range_frame.pack(fill=tk.X)
+        tk.Label(range_frame, text="From:").pack(side=tk.LEFT)
+        first_box = ttk.Combobox(range_frame, values=years, state='readonly', width=6)
+        first_box.set(years[0])
+        first_box.pack(side=tk.LEFT, padx=5)
+        tk.Label(range_frame, text="To:").pack(side=tk.LEFT)
+        last_box = ttk.Combobox(range_frame, values=years, state='readonly', width=6)
+        last_box.set(years[-1])
+        last_box.pack(side=tk.LEFT, padx=5)
+        
+        progress = ttk.Progressbar(container, mode='determinate')
+        progress.pack(fill=tk.X, pady=(15,5))
+        status_label = tk.Label(container, text="", fg='gray')
+        status_label.pack(fill=tk.X)
+        
+        button_frame = tk.Frame(container)
+        button_frame.pack(fill=tk.X, pady=(10,0))
+        job = {}
+        
+        def export():
+            first, last = int(first_box.get()), int(last_box.get())
+            if first > last:
+                messagebox.showerror("Error", "The first year must not be after the last one")
+                return
+            path = filedialog.asksaveasfilename(title="Export report", defaultextension=".html",
+                                                initialfile=f"budget_report_{first}-{last}.html",
+                                                filetypes=[("HTML report", "*.html")])
+            if not path:
+                return
+            
+            self.ensure_loaded(f"{first}-01-01", f"{last}-12-31")
+            records = [(kind, r) for kind, history in enumerate((self.income_history, self.spending_history))
+                       for r in history if first <= int(r['timestamp'][:4]) <= last]
+            if not records:
+                messagebox.showinfo("Export Report", "No transactions in the selected years")
+                return
+            category_codes = {}
+            kinds = np.array([kind for kind, _ in records], dtype=np.int8)
+            categories = np.array([category_codes.setdefault(r['category'], len(category_codes)) for _, r in records])
+            timestamps = [r['timestamp'] for _, r in records]
+            amounts = self.convert_records([r for _, r in records])
+            category_names = list(category_codes)
+            
+            summary = yearly_summary(kinds, timestamps, amounts, self.base_currency)
+            (kinds, categories, amounts), slices = slice_by_month(kinds, categories, timestamps, amounts)
+            
+            # Charts render in worker processes; each gets only its month's slice of the arrays.
+            # Spawned workers start clean instead of forking a copy of the Tk interpreter.
+            executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+            futures = [executor.submit(render_month, key, kinds[start:end], categories[start:end],
+                                       amounts[start:end], category_names, self.base_currency)
+                       for key, start, end in slices]
+            job.update(executor=executor, futures=futures, path=path, title=f"Budget report {first}-{last}", summary=summary)
+            progress.config(maximum=len(futures), value=0)
+            export_button.config(state=tk.DISABLED)
+            status_label.config(text=f"Rendering {len(futures)} months...")
+            self.root.after(100, poll)
+        
+        def poll():
+            if 'futures' not in job or not report_window.winfo_exists():
+                return
+            done = sum(future.done() for future in job['futures'])
+            progress.config(value=done)
+            status_label.config(text=f"Rendered {done} of {len(job['futures'])} months")
+            if done < len(job['futures']):
+                self.root.after(100, poll)
+                return
+            executor = job.pop('executor')
+            executor.shutdown(wait=False)
+            futures = job.pop('futures')
+            export_button.config(state=tk.NORMAL)
+            try:
+                sections = dict(future.result() for future in futures)
+                with open(job['path'], 'w', encoding='utf-8') as f:
+                    f.write(assemble_report(job['title'], job['summary'], sections))
+            except Exception as e:
+                status_label.config(text="")
+                messagebox.showerror("Error", f"Failed to export report: {str(e)}")
+                return
+            status_label.config(text=f"Saved {os.path.basename(job['path'])}")
+            if messagebox.askyesno("Export Report", "Report saved. Open it in the browser?"):
+                webbrowser.open(f"file://{os.path.abspath(job['path'])}")
+        
+        def close():
+            if 'executor' in job:
+                job['executor'].shutdown(wait=False, cancel_futures=True)
+                job.clear()
+            report_window.destroy()
+        
+        export_button = tk.Button(button_frame, text="Export...", command=export)
+        export_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=close).pack(side=tk.RIGHT, padx=5)
+        report_window.protocol("WM_DELETE_WINDOW", close)
+
+    def reload_ledger(self):
+        """Drop the in-memory ledger and load it again from the partitions on disk"""
+        self.income_history = []
+        self.spending_history = []
+        self.loaded_years = set()
+        self.dirty_years = set()
+        self.checkpoint_partitions = {}
+        self.ledger_version += 1
+        self.load_data()
+        # The spending statistics and flags described the replaced ledger
+        self.spending_monitor.reset()
+        self.seed_spending_monitor()
+        self.write_checkpoint()
+        self.events.publish('reloaded')
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Budget Tracker")
+    parser.add_argument("--api", action="store_true", help="serve the local JSON API alongside the UI")
+    parser.add_argument("--api-port", type=int, default=8765, help="port for the local JSON API")
+    args = parser.parse_args()
+
     root = tk.Tk()
     app = BudgetTracker(root)
+    if args.api:
+        from ledger_api import LedgerAPIServer
+        api_server = LedgerAPIServer(app, port=args.api_port)
+        try:
+            api_server.start()
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Error", f"Failed to start the API on port {args.api_port}: {str(e)}")
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_CURRENCY = "USD"
+CURRENCY_SYMBOLS = {'USD': "$", 'EUR': "€", 'GBP': "£", 'JPY': "¥", 'CNY': "¥"}
+
+
+def format_amount(value, currency=DEFAULT_CURRENCY, thousands=False):
+    """Format an amount with its currency symbol, or its code when there is no symbol"""
+    number = f"{value:,.2f}" if thousands else f"{value:.2f}"
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    return f"{symbol}{number}" if symbol else f"{number} {currency}"
+
+
+def to_days(dates):
+    """Convert date or timestamp strings to an array of datetime64[D]"""
+    return np.array([str(d)[:10] for d in dates], dtype='datetime64[D]')
+
+
+class RateTable:
+    """Exchange rates read from a CSV of (date, pair, rate) rows.
+
+    A pair is written ``"EUR/USD"`` and means one EUR buys ``rate`` USD. Lookups
+    are as-of: a date uses the latest rate published on or before it, and dates
+    before the first rate use the first rate. Inverse pairs are derived, and
+    pairs with no direct quote are crossed through a shared currency.
+    """
+
+    def __init__(self, path="exchange_rates.csv"):
+        self.path = path
+        self.quotes = {}
+        self.series_cache = {}
+        self.rate_cache = {}
+        self.load()
+
+    def load(self):
+        self.quotes.clear()
+        self.series_cache.clear()
+        self.rate_cache.clear()
+        if not os.path.exists(self.path):
+            return
+        df = pd.read_csv(self.path)
+        df['date'] = df['date'].astype(str).str[:10]
+        df = df.sort_values('date', kind='stable')
+        for pair, group in df.groupby('pair'):
+            base, quote = (code.strip().upper() for code in pair.split("/"))
+            self.quotes[(base, quote)] = (to_days(group['date']), group['rate'].to_numpy(dtype=float))
+
+    def currencies(self):
+        codes = {DEFAULT_CURRENCY}
+        for base, quote in self.quotes:
+            codes.update((base, quote))
+        return sorted(codes)
+
+    def quoted(self, source, target):
+        if (source, target) in self.quotes:
+            return ('direct', (source, target))
+        if (target, source) in self.quotes:
+            return ('inverse', (target, source))
+        return None
+
+    def series(self, source, target):
+        """Return how to convert source into target: a direct, inverse or one-hop cross quote"""
+        key = (source, target)
+        if key not in self.series_cache:
+            found = self.quoted(source, target)
+            if found is None:
+                for via in self.currencies():
+                    if via not in key and self.quoted(source, via) and self.quoted(via, target):
+                        found = ('cross', via)
+                        break
+            self.series_cache[key] = found
+        return self.series_cache[key]
+
+    def rates(self, source, target, days):
+        """Vectorized as-of rates from source into target for an array of days"""
+        if source == target:
+            return np.ones(len(days))
+        found = self.series(source, target)
+        if found is None:
+            raise KeyError(f"No exchange rate for {source}/{target}")
+        how, arg = found
+        if how == 'cross':
+            return self.rates(source, arg, days) * self.rates(arg, target, days)
+        dates, values = self.quotes[arg]
+        positions = np.searchsorted(dates, days, side='right') - 1
+        looked_up = values[np.clip(positions, 0, len(values) - 1)]
+        return looked_up if how == 'direct' else 1.0 / looked_up
+
+    def rate(self, source, target, day):
+        """Single as-of lookup, cached per (source, target, day)"""
+        key = (source, target, str(day)[:10])
+        if key not in self.rate_cache:
+            self.rate_cache[key] = float(self.rates(source, target, to_days([key[2]]))[0])
+        return self.rate_cache[key]
+
+    def convert(self, amounts, currencies, days, target):
+        """Convert arrays of amounts into target, one vectorized lookup per source currency"""
+        amounts = np.asarray(amounts, dtype=float)
+        currencies = np.asarray(currencies, dtype=object)
+        days = np.asarray(days, dtype='datetime64[D]')
+        converted = amounts.copy()
+        for source in pd.unique(currencies):
+            if source == target:
+                continue
+            mask = currencies == source
+            converted[mask] = amounts[mask] * self.rates(source, target, days[mask])
+        return converted
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import math
+import queue
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+RECORD_TYPES = ('income', 'spending')
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 415: "Unsupported Media Type", 500: "Internal Server Error"}
+LOCAL_HOSTS = ('127.0.0.1', 'localhost')
+WRITE_OPS = ('add', 'delete')
+
+
+class LedgerAPIServer:
+    """Local HTTP/JSON API over the in-memory ledger of a BudgetTracker.
+
+    The asyncio server runs in a background thread and only parses requests.
+    Every ledger operation is handed to the Tk thread through a queue, which is
+    drained on a short ``after`` timer so a burst of requests is applied as one
+    batch: a single ``save_data`` and a single redraw per batch of writes.
+    """
+
+    def __init__(self, app, host="127.0.0.1", port=8765, poll_ms=10):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.poll_ms = poll_ms
+        self.requests = queue.Queue()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.error = None  # Why the server thread failed to listen, if it did
+        self.handlers = {
+            'add': self.handle_add,
+            'delete': self.handle_delete,
+            'list': self.handle_list,
+            'totals': self.handle_totals,
+        }
+
+    def start(self):
+        """Start the server thread and, once it listens, the Tk-side queue polling.
+
+        Raises the server's own error (e.g. OSError for a port in use), or
+        RuntimeError if it does not come up in time.
+        """
+        self.thread = threading.Thread(target=self.run, name="ledger-api", daemon=True)
+        self.thread.start()
+        if not self.ready.wait(5):
+            raise RuntimeError("API server did not start in time")
+        if self.error is not None:
+            raise self.error
+        self.app.root.after(self.poll_ms, self.drain)
+
+    def stop(self):
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+    # --- server thread -------------------------------------------------
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            if self.ready.is_set():
+                raise
+            # Hand start-up failures to start(), which is waiting on ready
+            self.error = e
+            self.ready.set()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port, backlog=1024)
+        self.ready.set()
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                body = b""
+                length = int(headers.get('content-length', 0) or 0)
+                if length:
+                    body = await reader.readexactly(length)
+
+                status, payload = await self.route(method, target, headers, body)
+                data = json.dumps(payload).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, target, headers, body):
+        # A web page can make the browser send requests here. A Host naming another site means DNS
+        # rebinding, and requiring a JSON content type makes cross-origin writes need a CORS preflight,
+        # which this server never grants.
+        if headers.get('host', '').lower() not in [f"{host}:{self.port}" for host in LOCAL_HOSTS]:
+            return 403, {'error': "Host must be 127.0.0.1 or localhost with the API port"}
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ['totals']:
+            if method != 'GET':
+                return 405, {'error': "Method not allowed"}
+            return await self.submit('totals', query)
+
+        if parts[:1] == ['transactions']:
+            if len(parts) == 1 and method == 'GET':
+                return await self.submit('list', query)
+            if len(parts) == 1 and method == 'POST':
+                if headers.get('content-type', '').split(";")[0].strip().lower() != 'application/json':
+                    return 415, {'error': "Content-Type must be application/json"}
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return 400, {'error': "Body is not valid JSON"}
+                if isinstance(payload, dict):
+                    payload = [payload]
+                if not isinstance(payload, list) or not all(isinstance(item, dict) for item in payload):
+                    return 400, {'error': "Body must be a transaction object or a list of them"}
+                return await self.submit('add', payload)
+            if len(parts) == 3 and method == 'DELETE':
+                query.update({'type': parts[1], 'index': parts[2]})
+                return await self.submit('delete', query)
+            return 405, {'error': "Method not allowed"}
+
+        return 404, {'error': "Not found"}
+
+    async def submit(self, op, payload):
+        """Queue an operation for the Tk thread and wait for its result"""
+        future = self.loop.create_future()
+        self.requests.put((op, payload, future))
+        return await future
+
+    # --- Tk thread -----------------------------------------------------
+
+    def drain(self):
+        """Apply every queued operation, then persist once; open views redraw from the batched ledger events"""
+        try:
+            self.apply_batch()
+        finally:
+            # An unexpected failure must not stop the API: keep polling whatever happened
+            self.app.root.after(self.poll_ms, self.drain)
+
+    def apply_batch(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+
+        if batch:
+            results = []
+            changed = False
+            for op, payload, future in batch:
+                try:
+                    status, result, wrote = self.handlers[op](payload)
+                except (KeyError, ValueError, IndexError, TypeError) as e:
+                    status, result, wrote = 400, {'error': str(e)}, False
+                except Exception as e:
+                    # A write may have changed the ledger before failing, so still persist the batch
+                    status, result, wrote = 500, {'error': str(e)}, op in WRITE_OPS
+                changed = changed or wrote
+                results.append((future, status, result, wrote))
+
+            if changed:
+                try:
+                    self.app.save_data()
+                except Exception as e:
+                    # The writes are in memory only; every writer in the batch is told so
+                    results = [(future, 500, {'error': f"Failed to save data: {str(e)}"}, wrote) if wrote
+                               else (future, status, result, wrote)
+                               for future, status, result, wrote in results]
+
+            for future, status, result, _ in results:
+                self.loop.call_soon_threadsafe(self.resolve, future, status, result)
+
+    @staticmethod
+    def resolve(future, status, result):
+        if not future.done():
+            future.set_result((status, result))
+
+    def history(self, kind):
+        if kind not in RECORD_TYPES:
+            raise ValueError(f"type must be one of {', '.join(RECORD_TYPES)}")
+        return self.app.income_history if kind == 'income' else self.app.spending_history
+
+    def handle_add(self, items):
+        # Validate the whole request before touching the ledger so a bad item adds nothing
+        parsed = []
+        for item in items:
+            kind = item.get('type')
+            self.history(kind)
+            amount = float(item['amount'])
+            if not math.isfinite(amount) or amount <= 0:
+                raise ValueError("amount must be a positive number")
+            comment = str(item.get('comment', '')).strip()
+            category = str(item.get('category') or '').strip()
+            if not category:
+                # Imported transactions without a category are assigned one by rule
+                category = self.app.category_rules.suggest(kind, comment, amount)
+                if not category:
+                    raise ValueError("category is required when no rule matches the comment")
+            currency = str(item.get('currency') or self.app.base_currency).upper()
+            if currency != self.app.base_currency and self.app.rates.series(currency, self.app.base_currency) is None:
+                raise ValueError(f"No exchange rate for {currency}/{self.app.base_currency}")
+            parsed.append((kind, category, amount, comment, None, currency))
+
+        added = [dict(self.app.add_record(*args), type=args[0]) for args in parsed]
+        return 201, {'added': added}, True
+
+    def handle_delete(self, query):
+        history = self.history(query['type'])
+        index = int(query['index'])
+        if not 0 <= index < len(history):
+            return 404, {'error': "No such record"}, False
+        # Indices shift as records are removed or older years load, so the caller must name the record it saw
+        if not query.get('timestamp'):
+            raise ValueError("timestamp of the record to delete is required")
+        if history[index]['timestamp'] != query['timestamp']:
+            return 409, {'error': "Record at this index has changed"}, False
+        record = self.app.delete_record(query['type'], index)
+        return 200, {'deleted': dict(record, type=query['type'])}, True
+
+    def select(self, query):
+        """Yield (type, index, record) for records inside the optional date range"""
+        start = query.get('start', '')
+        end = query.get('end', '')
+        self.app.ensure_loaded(start or None, end or None)
+        kinds = [query['type']] if query.get('type') else RECORD_TYPES
+        for kind in kinds:
+            for index, record in enumerate(self.history(kind)):
+                day = str(record['timestamp'])[:10]
+                if (not start or day >= start) and (not end or day <= end):
+                    yield kind, index, record
+
+    def handle_list(self, query):
+        records = [dict(record, type=kind, index=index) for kind, index, record in self.select(query)]
+        return 200, {'transactions': records}, False
+
+    def handle_totals(self, query):
+        if not query.get('start') and not query.get('end'):
+            income, spending = self.app.total_income, self.app.total_spending
+        else:
+            selected = {'income': [], 'spending': []}
+            for kind, _, record in self.select(query):
+                selected[kind].append(record)
+            income = float(self.app.convert_records(selected['income']).sum())
+            spending = float(self.app.convert_records(selected['spending']).sum())
+        return 200, {
+            'currency': self.app.base_currency,
+            'income': income,
+            'spending': spending,
+            'balance': income - spending,
+        }, False
@@ -0,0 +1,52 @@
+import sys
+
+
+class LedgerEvents:
+    """Ledger change notifications, delivered to subscribers in one batch per Tk event-loop turn.
+
+    Events are dicts with an ``event`` key:
+      added / deleted  -- 'type', 'record', 'delta' (base-currency amount, negative
+                          for deletes) and 'cell' (the pivot cell patched in place, or None)
+      category         -- 'type', 'action' ('added', 'renamed' or 'removed'), 'old', 'new'
+      reloaded         -- totals or the whole ledger changed in bulk; views redraw
+    Every subscriber gets the full list of events queued since the last flush and
+    applies only what concerns it, so a burst of changes (batch entry, API
+    requests) costs each view one update.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.subscribers = []
+        self.pending = []
+        self.scheduled = False
+
+    def subscribe(self, callback, widget=None):
+        """Call callback(events) after every batch; with a widget, unsubscribe when it is destroyed"""
+        self.subscribers.append(callback)
+        if widget is not None:
+            def unsubscribe(event):
+                if event.widget is widget:
+                    self.unsubscribe(callback)
+            widget.bind("<Destroy>", unsubscribe, add='+')
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def publish(self, event, **fields):
+        fields['event'] = event
+        self.pending.append(fields)
+        if not self.scheduled:
+            self.scheduled = True
+            self.root.after_idle(self.flush)
+
+    def flush(self):
+        events, self.pending = self.pending, []
+        self.scheduled = False
+        for callback in list(self.subscribers):
+            if callback in self.subscribers:  # An earlier subscriber may have closed this view
+                try:
+                    callback(events)
+                except Exception:
+                    # One broken view (e.g. half destroyed) must not keep the batch from the others
+                    self.root.report_callback_exception(*sys.exc_info())
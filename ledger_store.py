@@ -0,0 +1,167 @@
+import hashlib
+import io
+import json
+import os
+import pandas as pd
+from currency import DEFAULT_CURRENCY
+
+COLUMNS = ['type', 'category', 'amount', 'timestamp', 'comment', 'currency']
+SUMMARY_PREFIX = "#summary:"
+
+
+class LedgerStore:
+    """Ledger rows split into one CSV partition per year.
+
+    Each partition starts with a one-line summary header holding its row count,
+    its totals per type, category and currency, and its per-day sums, which is
+    enough to compute all-time totals without reading any rows::
+
+        #summary:{"rows": 2, "totals": {...}, "days": [["spending", "USD", "2024-01-02", 12.5], ...]}
+        type,category,amount,timestamp,comment,currency
+        ...
+    """
+
+    def __init__(self, directory="budget_data"):
+        self.directory = directory
+        self.checkpoint_path = os.path.join(directory, "checkpoint.json")
+
+    def path(self, year):
+        return os.path.join(self.directory, f"{year}.csv")
+
+    def years(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".csv") and name[:-4].isdigit())
+
+    def read_summary(self, year):
+        """Read only the header line of a partition"""
+        with open(self.path(year), encoding='utf-8') as f:
+            line = f.readline()
+        if not line.startswith(SUMMARY_PREFIX):
+            return self.summarize(self.read_partition(year))
+        return json.loads(line[len(SUMMARY_PREFIX):])
+
+    def read_partition(self, year):
+        with open(self.path(year), encoding='utf-8') as f:
+            has_summary = f.readline().startswith(SUMMARY_PREFIX)
+        df = pd.read_csv(self.path(year), skiprows=1 if has_summary else 0, dtype={'category': str, 'comment': str})
+        return normalize(df)
+
+    def iter_partition(self, year, chunksize):
+        """Read a partition in fixed-size row chunks"""
+        with open(self.path(year), encoding='utf-8') as f:
+            has_summary = f.readline().startswith(SUMMARY_PREFIX)
+        reader = pd.read_csv(self.path(year), skiprows=1 if has_summary else 0, chunksize=chunksize,
+                             dtype={'category': str, 'comment': str})
+        with reader:
+            for chunk in reader:
+                yield normalize(chunk)
+
+    def write_partition(self, year, df):
+        """Atomically rewrite one partition and return its new summary"""
+        if df.empty:
+            if os.path.exists(self.path(year)):
+                os.remove(self.path(year))
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        summary = self.summarize(df)
+        temp_path = self.path(year) + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(SUMMARY_PREFIX + json.dumps(summary, separators=(',', ':')) + "\n")
+            df[COLUMNS].to_csv(f, index=False)
+        os.replace(temp_path, self.path(year))
+        return summary
+
+    def stat(self, year):
+        """Cheap change detector for a partition: (size in bytes, mtime in ns)"""
+        info = os.stat(self.path(year))
+        return info.st_size, info.st_mtime_ns
+
+    def digest(self, year, size):
+        """SHA-1 of the first size bytes of a partition"""
+        sha = hashlib.sha1()
+        remaining = size
+        with open(self.path(year), 'rb') as f:
+            while remaining > 0:
+                chunk = f.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                sha.update(chunk)
+                remaining -= len(chunk)
+        return sha.hexdigest()
+
+    def read_tail(self, year, offset):
+        """Read only the rows appended to a partition after byte offset"""
+        with open(self.path(year), 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        if not tail.strip():
+            return normalize(pd.DataFrame(columns=COLUMNS))
+        df = pd.read_csv(io.BytesIO(tail), names=COLUMNS, header=None, dtype={'category': str, 'comment': str})
+        return normalize(df)
+
+    def read_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_checkpoint(self, checkpoint):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, separators=(',', ':'))
+        os.replace(temp_path, self.checkpoint_path)
+
+    @staticmethod
+    def summarize(df):
+        totals = {}
+        for (kind, category, currency), amount in df.groupby(['type', 'category', 'currency'])['amount'].sum().items():
+            totals.setdefault(kind, {}).setdefault(category, {})[currency] = float(amount)
+        days = df['amount'].groupby([df['type'], df['currency'], df['timestamp'].str[:10]]).sum()
+        return {
+            'rows': int(len(df)),
+            'totals': totals,
+            'days': [[kind, currency, day, float(amount)] for (kind, currency, day), amount in days.items()],
+        }
+
+    def migrate(self, legacy_file):
+        """Split a single-file ledger into yearly partitions, keeping the old file as a backup"""
+        df = normalize(pd.read_csv(legacy_file, dtype={'category': str, 'comment': str}))
+        for year, part in df.groupby(df['timestamp'].str[:4]):
+            self.write_partition(int(year), part)
+        os.replace(legacy_file, legacy_file + ".migrated")
+
+
+def merge_summaries(first, second):
+    """Combine two partition summaries, e.g. a checkpointed one and the rows appended since"""
+    totals = json.loads(json.dumps(first['totals']))
+    for kind, categories in second['totals'].items():
+        for category, currencies in categories.items():
+            target = totals.setdefault(kind, {}).setdefault(category, {})
+            for currency, amount in currencies.items():
+                target[currency] = target.get(currency, 0.0) + amount
+    days = {(kind, currency, day): amount for kind, currency, day, amount in first['days']}
+    for kind, currency, day, amount in second['days']:
+        days[(kind, currency, day)] = days.get((kind, currency, day), 0.0) + amount
+    return {
+        'rows': first['rows'] + second['rows'],
+        'totals': totals,
+        'days': [[kind, currency, day, amount] for (kind, currency, day), amount in sorted(days.items())],
+    }
+
+
+def normalize(df):
+    """Fill in columns that older ledger files may lack"""
+    if 'comment' not in df.columns:
+        df['comment'] = ''
+    if 'currency' not in df.columns:
+        df['currency'] = DEFAULT_CURRENCY
+    df['comment'] = df['comment'].fillna('')
+    df['currency'] = df['currency'].fillna(DEFAULT_CURRENCY)
+    df['amount'] = df['amount'].astype(float)
+    df['timestamp'] = df['timestamp'].astype(str)
+    return df
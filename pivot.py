@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+MONTHS = list(range(1, 13))
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def build_grid(categories, timestamps, amounts):
+    """Category x month sums of one year's records in a single group-by"""
+    if len(amounts) == 0:
+        return pd.DataFrame(0.0, index=pd.Index([], name='category'), columns=MONTHS)
+    months = np.array([int(ts[5:7]) for ts in timestamps])
+    grid = pd.Series(np.asarray(amounts, dtype=float)).groupby([np.asarray(categories, dtype=object), months]).sum()
+    return grid.unstack(fill_value=0.0).reindex(columns=MONTHS, fill_value=0.0).rename_axis('category')
+
+
+class PivotCache:
+    """Category x month grids per (type, year), valid for one version of that partition.
+
+    A grid stays usable after a single add or delete in its partition if the
+    change is applied to it right away (``apply`` moves it from the version
+    before the change to the one after); any other change just moves the
+    version on and the grid is rebuilt the next time it is asked for. Changes to
+    other partitions leave it alone.
+    """
+
+    def __init__(self):
+        self.grids = {}  # (type, year) -> (version, DataFrame)
+
+    def get(self, kind, year, version):
+        cached = self.grids.get((kind, year))
+        if cached and cached[0] == version:
+            return cached[1]
+        return None
+
+    def put(self, kind, year, version, grid):
+        self.grids[(kind, year)] = (version, grid)
+
+    def apply(self, kind, record, delta, before, after):
+        """Add delta to the record's cell if its grid was current (at version before) just before this change.
+
+        Returns the (year, category, month) cell patched; the category's row is
+        gone from the grid when the change emptied it.
+        """
+        year = int(record['timestamp'][:4])
+        cached = self.grids.get((kind, year))
+        if not cached:
+            return None
+        if cached[0] != before:
+            del self.grids[(kind, year)]
+            return None
+        grid = cached[1]
+        category = record['category']
+        if category not in grid.index:
+            grid.loc[category] = 0.0
+        month = int(record['timestamp'][5:7])
+        grid.at[category, month] += delta
+        if delta < 0 and np.allclose(grid.loc[category], 0.0, rtol=0.0, atol=1e-9):
+            # Its last record is gone: build_grid would not list the category at all
+            grid = grid.drop(index=category)
+        self.grids[(kind, year)] = (after, grid)
+        return year, category, month
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+DATE_COLUMNS = ('date', 'transaction date', 'posted date', 'posting date', 'value date')
+AMOUNT_COLUMNS = ('amount', 'value', 'transaction amount')
+DESCRIPTION_COLUMNS = ('description', 'memo', 'payee', 'details', 'narrative')
+
+
+def find_column(df, names):
+    lookup = {column.strip().lower(): column for column in df.columns}
+    for name in names:
+        if name in lookup:
+            return lookup[name]
+    return None
+
+
+def load_statement(path):
+    """Read a bank statement CSV into a frame of signed amounts (credits positive, debits negative)"""
+    df = pd.read_csv(path)
+    date_col = find_column(df, DATE_COLUMNS)
+    if date_col is None:
+        raise ValueError("Statement has no date column")
+
+    amount_col = find_column(df, AMOUNT_COLUMNS)
+    if amount_col is not None:
+        amounts = to_number(df[amount_col])
+    else:
+        debit_col = find_column(df, ('debit', 'withdrawal', 'withdrawals'))
+        credit_col = find_column(df, ('credit', 'deposit', 'deposits'))
+        if debit_col is None and credit_col is None:
+            raise ValueError("Statement has no amount, debit or credit column")
+        amounts = pd.Series(0.0, index=df.index)
+        if credit_col is not None:
+            amounts += to_number(df[credit_col]).fillna(0.0).abs()
+        if debit_col is not None:
+            amounts -= to_number(df[debit_col]).fillna(0.0).abs()
+
+    description_col = find_column(df, DESCRIPTION_COLUMNS)
+    statement = pd.DataFrame({
+        'date': pd.to_datetime(df[date_col]).dt.strftime("%Y-%m-%d"),
+        'amount': amounts,
+        'description': df[description_col].fillna('').astype(str) if description_col else '',
+    })
+    return statement.dropna(subset=['amount']).reset_index(drop=True)
+
+
+def to_number(column):
+    if not pd.api.types.is_numeric_dtype(column):
+        column = column.astype(str).str.replace(r"[,$\s]", "", regex=True)
+    return pd.to_numeric(column, errors='coerce')
+
+
+def reconcile(ledger, bank, days=3, tolerance=0.01):
+    """Match ledger and bank rows on (amount within tolerance, date within +/- days).
+
+    Both inputs are frames with ``date`` (YYYY-MM-DD) and signed ``amount``
+    columns. The ledger is sorted once by (amount, date), so each distinct
+    amount is a block of rows in date order. For a bank row only the blocks
+    within the amount tolerance are visited, and in each one a binary search
+    lands on the bank date; the nearest unmatched rows on either side are found
+    through next/previous-free pointers, so matched rows are skipped in
+    near-constant time. Each bank row takes the closest unmatched ledger row by
+    date. Returns (matched pairs of row positions, unmatched ledger positions,
+    unmatched bank positions).
+    """
+    ledger_days = pd.to_datetime(ledger['date']).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    bank_days = pd.to_datetime(bank['date']).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    ledger_amounts = ledger['amount'].to_numpy(dtype=float)
+    bank_amounts = bank['amount'].to_numpy(dtype=float)
+
+    ledger_order = np.lexsort((ledger_days, ledger_amounts))
+    bank_order = np.lexsort((bank_days, bank_amounts))
+    sorted_days = ledger_days[ledger_order]
+    block_amounts, block_starts = np.unique(ledger_amounts[ledger_order], return_index=True)
+    block_ends = np.append(block_starts[1:], len(ledger_order))
+
+    # next_free[i]: first unmatched position >= i; prev_free[i + 1]: last unmatched position <= i
+    next_free = list(range(len(ledger_order) + 1))
+    prev_free = list(range(-1, len(ledger_order)))
+
+    def find(pointers, i, offset):
+        root = i
+        while pointers[root + offset] != root:
+            root = pointers[root + offset]
+        while pointers[i + offset] != root:  # Path compression
+            pointers[i + offset], i = root, pointers[i + offset]
+        return root
+
+    matched = []
+    bank_only = []
+    used = np.zeros(len(ledger_order), dtype=bool)
+    for b in bank_order:
+        amount = bank_amounts[b]
+        day = bank_days[b]
+        first = np.searchsorted(block_amounts, amount - tolerance, side='left')
+        last = np.searchsorted(block_amounts, amount + tolerance, side='right')
+        best = None
+        best_gap = None
+        for block in range(first, last):
+            start, end = block_starts[block], block_ends[block]
+            position = start + np.searchsorted(sorted_days[start:end], day)
+            after = find(next_free, position, 0)
+            before = find(prev_free, position - 1, 1)
+            for candidate in (before, after):
+                if start <= candidate < end:
+                    gap = abs(sorted_days[candidate] - day)
+                    if gap <= days and (best_gap is None or gap < best_gap):
+                        best, best_gap = candidate, gap
+        if best is None:
+            bank_only.append(int(b))
+        else:
+            used[best] = True
+            next_free[best] = best + 1
+            prev_free[best + 1] = best - 1
+            matched.append((int(ledger_order[best]), int(b)))
+
+    ledger_only = sorted(int(i) for i in ledger_order[~used])
+    return sorted(matched), ledger_only, sorted(bank_only)
@@ -0,0 +1,89 @@
+import base64
+import html
+import io
+import numpy as np
+import pandas as pd
+from currency import format_amount
+from pivot import MONTH_NAMES
+
+KIND_NAMES = ['income', 'spending']
+
+
+def slice_by_month(kinds, categories, timestamps, amounts):
+    """Sort the ledger columns by month once; return them with a (month key, start, end) slice per month.
+
+    kinds are 0 for income and 1 for spending, categories are integer codes and
+    amounts are already in the reporting currency. A month key is year * 12 + month - 1.
+    """
+    months = np.array([int(ts[:4]) * 12 + int(ts[5:7]) - 1 for ts in timestamps], dtype=np.int64)
+    order = np.argsort(months, kind='stable')
+    months = months[order]
+    columns = (np.asarray(kinds)[order], np.asarray(categories)[order], np.asarray(amounts, dtype=float)[order])
+    keys, starts = np.unique(months, return_index=True)
+    ends = np.append(starts[1:], len(months))
+    return columns, [(int(key), int(start), int(end)) for key, start, end in zip(keys, starts, ends)]
+
+
+def render_month(key, kinds, categories, amounts, category_names, currency):
+    """Worker: one month's category breakdown and chart, returned as an HTML fragment.
+
+    Runs in a separate process, so it imports pyplot itself on the Agg backend
+    and only receives the month's slice of the ledger arrays.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    year, month = divmod(key, 12)
+    title = f"{MONTH_NAMES[month]} {year}"
+    sums = pd.Series(amounts).groupby([kinds, categories]).sum()
+
+    rows = []
+    fig, axes = plt.subplots(1, 2, figsize=(9, 3.5))
+    for kind, ax in zip((0, 1), axes):
+        by_category = sums[kind].sort_values(ascending=False) if kind in sums.index.get_level_values(0) else pd.Series(dtype=float)
+        labels = [category_names[code] for code in by_category.index]
+        ax.barh(labels[::-1], by_category.values[::-1], color='#4CAF50' if kind == 0 else '#F44336')
+        ax.set_title(KIND_NAMES[kind].capitalize(), fontsize=10, fontweight='bold')
+        ax.tick_params(labelsize=8)
+        for label, value in zip(labels, by_category.values):
+            rows.append(f"<tr><td>{KIND_NAMES[kind]}</td><td>{html.escape(str(label))}</td>"
+                        f"<td class='num'>{format_amount(value, currency, thousands=True)}</td></tr>")
+    fig.suptitle(title, fontsize=12, fontweight='bold')
+    # Fixed margins: tight_layout measures every tick label and costs as much as drawing the figure
+    fig.subplots_adjust(left=0.14, right=0.98, bottom=0.1, top=0.82, wspace=0.45)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=90)
+    plt.close(fig)
+
+    image = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return key, (f"<section class='month'><h3>{title}</h3>"
+                 f"<img src='data:image/png;base64,{image}' alt='{title}'>"
+                 f"<table><tr><th>Type</th><th>Category</th><th>Amount</th></tr>{''.join(rows)}</table></section>")
+
+
+def yearly_summary(kinds, timestamps, amounts, currency):
+    """Income, spending and savings per year as an HTML table"""
+    years = np.array([int(ts[:4]) for ts in timestamps])
+    sums = pd.Series(np.asarray(amounts, dtype=float)).groupby([years, np.asarray(kinds)]).sum().unstack(fill_value=0.0)
+    sums = sums.reindex(columns=[0, 1], fill_value=0.0)
+    rows = []
+    for year, (income, spending) in sums.iterrows():
+        savings = income - spending
+        rate = savings / income * 100 if income > 0 else 0
+        rows.append(f"<tr><td>{year}</td><td class='num'>{format_amount(income, currency, thousands=True)}</td>"
+                    f"<td class='num'>{format_amount(spending, currency, thousands=True)}</td>"
+                    f"<td class='num'>{format_amount(savings, currency, thousands=True)}</td><td class='num'>{rate:.1f}%</td></tr>")
+    return ("<table><tr><th>Year</th><th>Income</th><th>Spending</th><th>Savings</th><th>Rate</th></tr>"
+            + "".join(rows) + "</table>")
+
+
+def assemble_report(title, summary, month_sections):
+    """Join the yearly summary and the month sections (in month order) into one HTML page"""
+    style = ("body{font-family:Arial,sans-serif;margin:2em}table{border-collapse:collapse;margin:1em 0}"
+             "td,th{border:1px solid #ccc;padding:4px 8px}.num{text-align:right}"
+             ".month{page-break-before:always}img{max-width:100%}")
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<style>{style}</style></head><body><h1>{html.escape(title)}</h1>"
+            f"<h2>Yearly summary</h2>{summary}<h2>Monthly breakdown</h2>"
+            + "".join(month_sections[key] for key in sorted(month_sections)) + "</body></html>")
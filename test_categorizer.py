@@ -0,0 +1,73 @@
+import json
+import re
+
+import pytest
+
+from categorizer import CategoryRules
+
+
+def make_rules(tmp_path, *rules):
+    category_rules = CategoryRules(str(tmp_path / "rules.json"))
+    for rule in rules:
+        category_rules.add_rule('spending', **rule)
+    return category_rules
+
+
+def test_same_text_tries_every_amount_range(tmp_path):
+    rules = make_rules(tmp_path,
+                       dict(category='Transport', keyword='uber', max_amount=20),
+                       dict(category='Food', keyword='uber', min_amount=20))
+    assert rules.categorize('spending', ['uber eats', 'uber ride'], [30, 12]) == ['Food', 'Transport']
+
+
+def test_overlapping_match_does_not_hide_earlier_rule(tmp_path):
+    rules = make_rules(tmp_path,
+                       dict(category='A', pattern='ab c'),
+                       dict(category='B', pattern='xab'))
+    assert rules.categorize('spending', ['xab c', 'xab'], [1, 1]) == ['A', 'B']
+
+
+def test_earlier_rule_wins_and_amount_rules_fill_in(tmp_path):
+    rules = make_rules(tmp_path,
+                       dict(category='Groceries', keyword='grocer'),
+                       dict(category='Food', pattern='gro'),
+                       dict(category='Big', min_amount=1000))
+    assert rules.categorize('spending', ['Grocery store', 'agro shop', 'rent', ''], [5, 5, 1500, 3]) == \
+        ['Groceries', 'Food', 'Big', None]
+
+
+@pytest.mark.parametrize('pattern', ['(?i)uber', r'(a)\1', '(?P<x>a)', '(a)(?(1)b)'])
+def test_add_rule_rejects_patterns_that_cannot_be_merged(tmp_path, pattern):
+    rules = make_rules(tmp_path, dict(category='Food', keyword='grocer'))
+    with pytest.raises(re.error):
+        rules.add_rule('spending', 'Transport', pattern=pattern)
+    assert len(rules.rules) == 1
+    assert rules.suggest('spending', 'grocer', 5) == 'Food'
+
+
+def test_escaped_backslash_is_not_a_backreference(tmp_path):
+    rules = make_rules(tmp_path, dict(category='Files', pattern=r'c:\\1'))
+    assert rules.suggest('spending', r'saved to c:\1', 5) == 'Files'
+
+
+def test_load_skips_rules_that_cannot_be_merged(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([
+        {'type': 'spending', 'category': 'Transport', 'pattern': '(?i)uber'},
+        {'type': 'spending', 'category': 'Echo', 'pattern': r'(a)\1'},
+        {'type': 'spending', 'category': 'Named', 'pattern': '(?P<x>taxi)'},
+        {'type': 'spending', 'category': 'Also named', 'pattern': '(?P<x>bus)'},
+        {'type': 'spending', 'category': 'Food', 'keyword': 'grocer'},
+    ]))
+    rules = CategoryRules(str(path))
+    assert [rule['category'] for rule in rules.rules] == ['Food']
+    assert len(rules.skipped) == 4
+    assert rules.categorize('spending', ['uber', 'taxi', 'grocer'], [5, 5, 5]) == [None, None, 'Food']
+
+
+def test_load_survives_malformed_json(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text("[{")
+    rules = CategoryRules(str(path))
+    assert rules.rules == [] and len(rules.skipped) == 1
+    assert rules.suggest('spending', 'anything', 5) is None